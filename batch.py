@@ -0,0 +1,122 @@
+"""NumPy struct-of-arrays boards for simulating many games at once.
+
+Every board is one row in a handful of arrays, so 10^5 boards are a few
+megabytes of NumPy memory rather than millions of Card objects. Shuffling,
+match checks and the memory AI's picks all run on whole columns at a time.
+"""
+import numpy as np
+
+from engine import GRID_SIZE, MATCH_SIZE, CARD_STATE_HIDDEN, CARD_STATE_MATCHED
+
+class BoardBatch:
+    """Card values and states for `count` boards, one row per board."""
+    def __init__(self, count, grid_size=GRID_SIZE, seed=None):
+        card_count = grid_size * grid_size
+        if card_count % MATCH_SIZE:
+            raise ValueError(f"{card_count} cards can't be split into groups of {MATCH_SIZE}")
+
+        self.rng = np.random.default_rng(seed)
+        self.count = count
+        self.grid_size = grid_size
+        self.card_count = card_count
+        self.value_count = card_count // MATCH_SIZE
+        self.deck = np.repeat(np.arange(1, self.value_count + 1, dtype=np.int16), MATCH_SIZE)
+
+        self.values = np.empty((count, card_count), dtype=np.int16)
+        self.states = np.empty((count, card_count), dtype=np.int8)
+        self.known = np.empty((count, card_count), dtype=bool)  # Cards the AIs have seen
+        self.scores = np.empty((count, 2), dtype=np.int32)
+        self.current_player = np.empty(count, dtype=np.int8)
+        self.turns = np.empty(count, dtype=np.int32)
+        self.matched_count = np.empty(count, dtype=np.int32)
+        self.reset()
+
+    def reset(self):
+        """Deal fresh shuffled boards and clear all game state."""
+        self.shuffle()
+        self.states.fill(CARD_STATE_HIDDEN)
+        self.known.fill(False)
+        self.scores.fill(0)
+        self.current_player.fill(1)
+        self.turns.fill(0)
+        self.matched_count.fill(0)
+
+    def shuffle(self):
+        """Independently shuffle the deck for every board."""
+        # Sorting random keys gives a uniform permutation per row
+        order = self.rng.random((self.count, self.card_count)).argsort(axis=1)
+        self.values[:] = self.deck[order]
+
+    def available_mask(self, rows=None):
+        """Cards that are still face down and can be flipped."""
+        states = self.states if rows is None else self.states[rows]
+        return states == CARD_STATE_HIDDEN
+
+    def is_match(self, picks, rows=None):
+        """True for each board whose picked card indices all share a value."""
+        values = self.values if rows is None else self.values[rows]
+        picked = np.take_along_axis(values, picks, axis=1)
+        return (picked == picked[:, :1]).all(axis=1)
+
+    def is_over(self):
+        return self.matched_count == self.card_count
+
+    def random_pick(self, mask):
+        """One uniformly random True column per row of `mask`."""
+        keys = self.rng.random(mask.shape)
+        keys[~mask] = -1.0
+        return keys.argmax(axis=1)
+
+    def known_triples(self, rows, values, candidates):
+        """Lowest value per board with MATCH_SIZE remembered face-down cards (0 if none)."""
+        width = self.value_count + 1
+        slots = (np.arange(len(rows))[:, None] * width + values)[candidates]
+        counts = np.bincount(slots, minlength=len(rows) * width).reshape(len(rows), width)
+        full = counts >= MATCH_SIZE
+        return np.where(full.any(axis=1), full.argmax(axis=1), 0)
+
+    def play_turn(self, rows):
+        """Play one memory-AI turn on each of the given boards."""
+        values = self.values[rows]
+        known = self.known[rows]
+        hidden = self.available_mask(rows)
+        board = np.arange(len(rows))
+
+        # First card: a remembered triple if there is one, otherwise random
+        target = self.known_triples(rows, values, known & hidden)
+        picks = []
+        for step in range(MATCH_SIZE):
+            follow = known & hidden & (values == target[:, None])
+            pick = np.where(follow.any(axis=1), follow.argmax(axis=1), self.random_pick(hidden))
+            hidden[board, pick] = False
+            known[board, pick] = True
+            picks.append(pick)
+
+            value = values[board, pick]
+            if step == 0:
+                target = value
+            else:
+                # Only keep following memory while every card so far matched
+                target = np.where(value == target, target, 0)
+
+        picks = np.stack(picks, axis=1)
+        matched = self.is_match(picks, rows)
+
+        self.known[rows] = known
+        matched_rows = rows[matched]
+        self.states[matched_rows[:, None], picks[matched]] = CARD_STATE_MATCHED
+        self.matched_count[matched_rows] += MATCH_SIZE
+        self.scores[matched_rows, self.current_player[matched_rows] - 1] += 1
+
+        missed_rows = rows[~matched]
+        self.current_player[missed_rows] = 3 - self.current_player[missed_rows]
+        self.turns[rows] += 1
+        return matched
+
+    def simulate(self):
+        """Play every board to the end with the memory AI on both sides."""
+        rows = np.flatnonzero(~self.is_over())
+        while len(rows):
+            self.play_turn(rows)
+            rows = rows[~self.is_over()[rows]]
+        return self
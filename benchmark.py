@@ -0,0 +1,291 @@
+"""Headless performance benchmarks for drawing, picking, setup and AI decisions.
+
+Runs under SDL's dummy video driver, so no window opens. Results are saved as
+a JSON baseline; --compare checks a run against one and exits with status 1
+if anything got slower than the threshold allows.
+
+Usage: python benchmark.py --out baseline.json
+       python benchmark.py --compare baseline.json --threshold 0.15
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+
+import pygame
+
+try:
+    import resource  # Context switch counts; Unix only
+except ImportError:
+    resource = None
+
+import engine
+import game as ui
+from engine import (
+    CARD_STATE_HIDDEN, CARD_STATE_FLIPPING_UP, CARD_STATE_REVEALED,
+    CARD_STATE_FLIPPING_DOWN, CARD_STATE_MATCHED_FADING, CARD_STATE_MATCHED,
+    MODE_VS_AI
+)
+from scheduler import Scheduler
+
+DRAW_GRID_SIZES = (6, 12, 30, 100)
+AI_DIFFICULTIES = ("easy", "medium", "hard", "expert", "montecarlo", "hints")
+AI_DECISIONS = 200  # Flips timed per difficulty
+MONTECARLO_DECISIONS = 20  # Each one takes the full time budget
+PICKS = 10000  # Positions per picking round
+REPEAT = 5  # Timing rounds; the best one is kept
+THRESHOLD = 0.15  # Allowed slowdown before --compare calls it a regression
+STARTUP_RUNS = 5  # Fresh processes started per startup measurement; the median is kept
+TWEEN_COUNTS = (0, 100, 10000)  # Cards flipping at once on the marathon board
+IDLE_SECONDS = 3  # How long the untouched menu is watched
+IMPORT_TIMER = "import time; start = time.perf_counter(); import game; print(time.perf_counter() - start)"
+
+# (name, state, flip_progress, fade_progress) for Card.draw
+CARD_DRAW_STATES = (
+    ("hidden", CARD_STATE_HIDDEN, 0, 0),
+    ("flipping_up", CARD_STATE_FLIPPING_UP, 25, 0),
+    ("flipping_down", CARD_STATE_FLIPPING_DOWN, 75, 0),
+    ("revealed", CARD_STATE_REVEALED, 100, 0),
+    ("matched_fading", CARD_STATE_MATCHED_FADING, 100, 50),
+    ("matched", CARD_STATE_MATCHED, 100, 100),
+)
+
+def best_time(run, repeat=REPEAT):
+    """Seconds per call of run(), best of `repeat` rounds long enough to time."""
+    timer = timeit.Timer(run)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+def result(value, unit, higher_is_better=False):
+    return {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+def bench_draw_board(results):
+    """Full-board frame time, the worst case after a scroll, zoom or new game."""
+    for size in DRAW_GRID_SIZES:
+        game, _ = ui.setup_game(MODE_VS_AI, seed=0, grid_size=size)
+        def frame():
+            ui.app.board_renderer.invalidate()
+            ui.draw_board(game.cards, 0, 0, 1, MODE_VS_AI)
+        frame()  # Warm the surface cache
+        results[f"draw_board_full[{size}x{size}]"] = result(best_time(frame) * 1000, "ms")
+
+        # A steady frame with one card mid-flip
+        card = game.cards[0]
+        card.flip_up()
+        def animated_frame():
+            card.flip_progress = (card.flip_progress + 1) % 100
+            ui.draw_board(game.cards, 0, 0, 1, MODE_VS_AI)
+        results[f"draw_board_one_card[{size}x{size}]"] = result(best_time(animated_frame) * 1000, "ms")
+
+def bench_card_draw(results):
+    game, _ = ui.setup_game(MODE_VS_AI, seed=0)
+    card = game.cards[0]
+    for name, state, flip_progress, fade_progress in CARD_DRAW_STATES:
+        card.state = state
+        card.flip_progress = flip_progress
+        card.fade_progress = fade_progress
+        card.draw(ui.app.screen)  # Warm the surface cache
+        results[f"card_draw[{name}]"] = result(best_time(lambda: card.draw(ui.app.screen)) * 1e6, "us")
+
+def finish_animations(game):
+    while ui.animate_cards(ui.FLIP_DURATION + ui.MATCH_FADE_DURATION):
+        pass
+
+def bench_tweens(results):
+    """One frame of animate_cards on a 100x100 board, by how many cards are mid-flip."""
+    for count in TWEEN_COUNTS:
+        game, _ = ui.setup_game(MODE_VS_AI, seed=0, grid_size=ui.MARATHON_GRID_SIZE)
+        for card in game.cards[:count]:
+            card.flip_up()
+        # No time passes, so the same flips are in flight every round
+        results[f"animate_cards[{count}]"] = result(best_time(lambda: ui.animate_cards(0)) * 1e6, "us")
+
+def ai_decision_times(difficulty, decisions, seed=0):
+    """Wall time of each ai_turn_handler flip, with its delays skipped in frame time."""
+    scheduler = Scheduler()
+    game, ai = ui.setup_game(MODE_VS_AI, seed=seed, difficulty=difficulty)
+    times = []
+    while len(times) < decisions:
+        if game.is_over():
+            seed += 1
+            game, ai = ui.setup_game(MODE_VS_AI, seed=seed, difficulty=difficulty)
+        if game.turn_complete():
+            game.resolve_turn()
+            finish_animations(game)
+            continue
+
+        # The AI plays every turn; only its own thinking is on the clock
+        flipped = len(game.flipped)
+        start = time.perf_counter()
+        ui.ai_turn_handler(game, ai, scheduler)
+        while scheduler.pending():
+            scheduler.update(ui.AI_FLIP_DELAY)
+        if len(game.flipped) > flipped:
+            times.append(time.perf_counter() - start)
+        finish_animations(game)
+    return times
+
+def bench_ai(results, difficulties=AI_DIFFICULTIES):
+    for difficulty in difficulties:
+        decisions = MONTECARLO_DECISIONS if difficulty == "montecarlo" else AI_DECISIONS
+        times = sorted(ai_decision_times(difficulty, decisions))
+        results[f"ai_decision_median[{difficulty}]"] = result(statistics.median(times) * 1000, "ms")
+        results[f"ai_decision_p95[{difficulty}]"] = result(times[int(len(times) * 0.95)] * 1000, "ms")
+
+def bench_setup_game(results):
+    seeds = iter(range(10 ** 9))
+    seconds = best_time(lambda: ui.setup_game(MODE_VS_AI, seed=next(seeds)))
+    results["setup_game"] = result(1 / seconds, "boards/s", higher_is_better=True)
+
+def bench_snapshot(results):
+    """Game.snapshot() and restore() mid-game, with the AI's memory."""
+    game, ai = ui.setup_game(MODE_VS_AI, seed=0, difficulty="hard")
+    start = game.snapshot()
+    while game.turns < 10:
+        while not game.turn_complete():
+            game.flip(ai.choose_card(game.board, game.flipped))
+        finish_animations(game)  # Cards only count as face up once their flip has played
+        game.resolve_turn()
+        finish_animations(game)
+    middle = game.snapshot()
+    results["snapshot"] = result(1 / best_time(game.snapshot), "states/s", higher_is_better=True)
+    def restore():
+        game.restore(start)
+        game.restore(middle)
+    results["restore"] = result(2 / best_time(restore), "states/s", higher_is_better=True)
+
+def bench_hints(results):
+    """Hint odds for every card of a 100x100 board halfway through, and one flip's update."""
+    import hints
+    game = engine.Game(ui.MARATHON_GRID_SIZE, random.Random(0))
+    hint_engine = hints.HintEngine(random.Random(0))
+    game.observers.append(hint_engine)
+    while game.matched_count < len(game.cards) // 2:
+        while not game.turn_complete():
+            game.flip(hint_engine.choose_card(game.board, game.flipped))
+        game.resolve_turn()
+    results["hint_odds[100x100]"] = result(
+        best_time(lambda: hint_engine.match_probabilities(game.board, game.flipped)) * 1e6, "us")
+    card = next(iter(game.board.hidden))
+    results["hint_flip_update"] = result(best_time(lambda: hint_engine.remember(card)) * 1e6, "us")
+
+def bench_picking(results):
+    game, _ = ui.setup_game(MODE_VS_AI, seed=0)
+    rng = random.Random(0)
+    positions = [(rng.randrange(ui.WIDTH), rng.randrange(ui.HEIGHT)) for _ in range(PICKS)]
+    def picks():
+        for position in positions:
+            ui.get_card_at_position(game.cards, position)
+    results["get_card_at_position"] = result(PICKS / best_time(picks), "picks/s", higher_is_better=True)
+
+def bench_startup(results):
+    """Cold start in fresh processes: importing game, and launch to the first menu frame."""
+    directory = os.path.dirname(os.path.abspath(ui.__file__))
+    def last_line(command):
+        output = subprocess.run(command, cwd=directory, capture_output=True, text=True, check=True).stdout
+        return output.strip().splitlines()[-1]  # pygame may print a banner first
+    import_times = [float(last_line([sys.executable, "-c", IMPORT_TIMER])) * 1000 for _ in range(STARTUP_RUNS)]
+    # The game prints "startup: <ms> ms to the first menu frame"
+    menu_times = [float(last_line([sys.executable, "game.py", "--startup-time", "--no-stats"]).split()[1])
+                  for _ in range(STARTUP_RUNS)]
+    results["startup_import"] = result(statistics.median(import_times), "ms")
+    results["startup_first_menu_frame"] = result(statistics.median(menu_times), "ms")
+
+def bench_idle(results):
+    """CPU use and wakeups while the menu sits untouched."""
+    pygame.time.set_timer(pygame.QUIT, IDLE_SECONDS * 1000, loops=1)  # Ends ui.main()
+    switches = resource.getrusage(resource.RUSAGE_SELF).ru_nvcsw if resource else 0
+    ui.profiler.reset_activity()
+    ui.main()
+    wakeups, cpu = ui.profiler.activity()
+    ui.app.start()  # main() closed the window on the way out
+    results["idle_menu_cpu"] = result(cpu * 100, "% of a core")
+    results["idle_menu_wakeups"] = result(wakeups, "wakeups/s")
+    if resource:
+        # Sleeps the process took, including any inside pygame and SDL, not just loop iterations
+        switches = resource.getrusage(resource.RUSAGE_SELF).ru_nvcsw - switches
+        results["idle_menu_context_switches"] = result(switches / IDLE_SECONDS, "per s")
+
+BENCHMARKS = {
+    "draw": bench_draw_board,
+    "card": bench_card_draw,
+    "tween": bench_tweens,
+    "ai": bench_ai,
+    "setup": bench_setup_game,
+    "snapshot": bench_snapshot,
+    "hints": bench_hints,
+    "pick": bench_picking,
+    "startup": bench_startup,
+    "idle": bench_idle,
+}
+
+def run_benchmarks(names=tuple(BENCHMARKS)):
+    results = {}
+    ui.app.start()
+    for name in names:
+        BENCHMARKS[name](results)
+    ui.configure_board(ui.GRID_SIZE, ui.GRID_SIZE)
+    return results
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """Print each result against the baseline and return the names that regressed."""
+    regressions = []
+    for name, current in results.items():
+        old = baseline.get(name)
+        if old is None or not old["value"]:
+            print(f"{name:40} {current['value']:12.3f} {current['unit']:9} (new)")
+            continue
+        change = current["value"] / old["value"] - 1
+        worse = -change if current["higher_is_better"] else change
+        flag = ""
+        if worse > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:40} {current['value']:12.3f} {current['unit']:9} {change:+8.1%}{flag}")
+    return regressions
+
+def machine_info():
+    return {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the headless performance benchmarks.")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--out", help="save results to this JSON file")
+    parser.add_argument("--compare", help="JSON baseline to check the results against")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="fractional slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.only)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"machine": machine_info(), "results": results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+    else:
+        for name, current in results.items():
+            print(f"{name:40} {current['value']:12.3f} {current['unit']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Scrollable, zoomable view onto a board larger than the window."""
+
+ZOOM_LEVELS = (0.25, 0.375, 0.5, 0.75, 1.0, 1.5, 2.0)  # Fixed steps keep cached sprites reusable
+
+class Camera:
+    """Maps board coordinates to screen coordinates inside a viewport."""
+    def __init__(self, view_width, view_height, world_width, world_height, zoom_levels=ZOOM_LEVELS):
+        self.view_width = view_width
+        self.view_height = view_height
+        self.world_width = world_width
+        self.world_height = world_height
+        self.zoom_levels = zoom_levels
+        self.zoom_level = zoom_levels.index(1.0) if 1.0 in zoom_levels else 0
+        self.x = 0  # Board coordinate at the left edge of the view
+        self.y = 0
+        self.version = 0  # Bumped on every move so renderers know to repaint
+
+    @property
+    def zoom(self):
+        return self.zoom_levels[self.zoom_level]
+
+    def to_screen(self, rect):
+        x, y, width, height = rect
+        zoom = self.zoom
+        return (int((x - self.x) * zoom), int((y - self.y) * zoom),
+                int(width * zoom), int(height * zoom))
+
+    def to_world(self, x, y):
+        return self.x + x / self.zoom, self.y + y / self.zoom
+
+    def visible_rect(self):
+        """The part of the board inside the viewport, in board coordinates."""
+        return (self.x, self.y, self.view_width / self.zoom, self.view_height / self.zoom)
+
+    def clamp(self):
+        max_x = max(0, self.world_width - self.view_width / self.zoom)
+        max_y = max(0, self.world_height - self.view_height / self.zoom)
+        self.x = min(max(self.x, 0), max_x)
+        self.y = min(max(self.y, 0), max_y)
+
+    def scroll(self, dx, dy):
+        """Move the view by (dx, dy) screen pixels."""
+        old = (self.x, self.y)
+        self.x += dx / self.zoom
+        self.y += dy / self.zoom
+        self.clamp()
+        if (self.x, self.y) != old:
+            self.version += 1
+
+    def zoom_at(self, steps, screen_x, screen_y):
+        """Zoom in (steps > 0) or out, keeping the board point under the cursor still."""
+        level = min(max(self.zoom_level + steps, 0), len(self.zoom_levels) - 1)
+        if level == self.zoom_level:
+            return
+        world_x, world_y = self.to_world(screen_x, screen_y)
+        self.zoom_level = level
+        self.x = world_x - screen_x / self.zoom
+        self.y = world_y - screen_y / self.zoom
+        self.clamp()
+        self.version += 1
@@ -0,0 +1,320 @@
+"""Render games to image sequences faster than real time, without a window.
+
+Games come from a recording archive (python game.py --record, tournament or
+recording.py) or are simulated between two tournament players. Each frame
+runs the same turn handlers, card animations and BoardRenderer as the game
+window, drawing into an offscreen surface under SDL's dummy driver. Time
+advances a fixed 1/fps per frame instead of following the clock, so frames
+come out as fast as they can be drawn. Writer threads save them as numbered
+PNGs or append them to one raw RGB file while the next frames render; zlib
+does the PNG compression without holding the GIL, and frames the renderer
+left unchanged are hard links to the last one instead of new files.
+--turns and --highlights keep only some turns; the others play out at once
+without being drawn.
+
+Usage: python clips.py --replay games.mmr --game 3 --out clips
+       python clips.py --players memory-hard montecarlo --games 20 --highlights --format rgb --out clips
+       ffmpeg -f rawvideo -pix_fmt rgb24 -s 800x850 -r 60 -i clips/game0.rgb game0.mp4
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import multiprocessing
+import queue
+import random
+import shutil
+import struct
+import threading
+import time
+import zlib
+
+import pygame
+
+import engine
+import game as ui
+import recording
+import themes
+import tournament
+from engine import MODE_VS_PLAYER
+from scheduler import Scheduler
+
+FPS = 60  # Frames per second of clip time
+SKIP_MS = 60000  # Time step for turns left out; long enough for any delay or animation to finish
+FORMAT_PNG = "png"
+FORMAT_RGB = "rgb"
+WRITER_WORKERS = max(1, (os.cpu_count() or 2) - 1)  # PNG encoders; leave a core for rendering
+MAX_QUEUED_FRAMES = 64  # Frames waiting for a writer before rendering waits too
+PNG_COMPRESSION = 3  # zlib level; the flat colors of the board compress well even at low levels
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+def png_chunk(tag, body):
+    return struct.pack(">I", len(body)) + tag + body + struct.pack(">I", zlib.crc32(tag + body))
+
+def encode_png(data, width, height, level=PNG_COMPRESSION):
+    """PNG file contents for rgb24 pixels, every row unfiltered."""
+    stride = width * 3
+    rows = b"".join(b"\x00" + data[start:start + stride] for start in range(0, stride * height, stride))
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)  # 8-bit RGB, no interlacing
+    return (PNG_SIGNATURE + png_chunk(b"IHDR", header) + png_chunk(b"IDAT", zlib.compress(rows, level))
+            + png_chunk(b"IEND", b""))
+
+class FrameWriter:
+    """Saves frames on background threads, so rendering never waits on encoding or disk."""
+    def __init__(self, path, frame_format=FORMAT_PNG, size=None, workers=WRITER_WORKERS):
+        self.path = path  # A directory of numbered PNGs, or one raw RGB file
+        self.frame_format = frame_format
+        self.size = size
+        self.count = 0
+        self.last = None  # (number, RGB bytes) of the last frame that changed
+        self.repeats = []  # (frame number, earlier identical frame number), linked once the PNGs exist
+        self.error = None  # First exception a writer thread hit
+        self.queue = queue.Queue(MAX_QUEUED_FRAMES)  # (number, RGB bytes); None stops a thread
+        if frame_format == FORMAT_PNG:
+            os.makedirs(path, exist_ok=True)
+            self.file = None
+        else:
+            workers = 1  # One thread keeps the stream in order
+            self.file = open(path, "wb")
+        self.threads = [threading.Thread(target=self.write_loop, daemon=True) for _ in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def write(self, surface, changed=True):
+        """Queue the surface as the next frame; changed=False repeats the last one without copying it."""
+        if self.error is not None:
+            raise self.error
+        if changed or self.last is None:
+            self.size = surface.get_size()
+            # Copied now, since the next frame draws over the surface
+            self.last = (self.count, pygame.image.tobytes(surface, "RGB"))
+            self.queue.put(self.last)
+        elif self.file is not None:
+            self.queue.put((self.count, self.last[1]))
+        else:
+            self.repeats.append((self.count, self.last[0]))
+        self.count += 1
+
+    def frame_path(self, number):
+        return os.path.join(self.path, f"frame_{number:06d}.png")
+
+    def write_loop(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            if self.error is not None:
+                continue  # Keep draining, so write() never blocks on a full queue
+            number, data = item
+            try:
+                if self.file is not None:
+                    self.file.write(data)
+                else:
+                    with open(self.frame_path(number), "wb") as f:
+                        f.write(encode_png(data, *self.size))
+            except Exception as e:
+                self.error = e
+
+    def close(self):
+        """Wait for every queued frame to be saved."""
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        if self.file is not None:
+            self.file.close()
+        if self.error is not None:
+            raise self.error
+        for number, same_as in self.repeats:
+            try:
+                os.link(self.frame_path(same_as), self.frame_path(number))
+            except OSError:
+                shutil.copyfile(self.frame_path(same_as), self.frame_path(number))  # No hard links here
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class SimulatedGame:
+    """A game played out headlessly, kept in the shape of a recording.Recording.
+
+    It is the writer its GameRecorder sends turns to, so the clip is rendered
+    from the same flips the simulation made.
+    """
+    def __init__(self, players, grid_size, seed):
+        self.turn_list = []
+        recorder = recording.GameRecorder(self, seed, *engine.board_shape(grid_size))
+        engine.play_game([tournament.PLAYERS[name] for name in players], grid_size, seed, [recorder])
+
+    def begin_game(self, seed, rows, cols):
+        self.seed, self.rows, self.cols = seed, rows, cols
+
+    def add_turn(self, player, matched, flips):
+        self.turn_list.append((player, matched, list(flips)))
+
+    def turns(self):
+        return iter(self.turn_list)
+
+    def new_game(self, card_factory=engine.Card):
+        # play_game shuffles with Random(seed) first, so this deals the same board
+        return engine.Game((self.rows, self.cols), random.Random(self.seed), card_factory)
+
+    def player(self, game):
+        return recording.ReplayPlayer(game, self)
+
+def parse_turns(spec):
+    """[(first, last or None), ...] from a spec like "1-10,40,55-" (turns count from 1)."""
+    ranges = []
+    for part in spec.split(","):
+        first, dash, last = part.strip().partition("-")
+        first = int(first) if first else 1
+        ranges.append((first, (int(last) if last else None) if dash else first))
+    return ranges
+
+def select_turns(played, ranges=None, highlights=False):
+    """Set of turn numbers to draw, or None for all of them."""
+    if ranges is None and not highlights:
+        return None
+    selected = set()
+    for number, (_, matched, _) in enumerate(played.turns(), 1):
+        if highlights and matched:
+            selected.add(number)
+        if ranges and any(first <= number and (last is None or number <= last) for first, last in ranges):
+            selected.add(number)
+    return selected
+
+def render_game(played, writer, fps=FPS, turns=None):
+    """Play a recorded game through the UI's turn handlers, writing a frame per 1/fps of game time."""
+    game = played.new_game(card_factory=ui.Card)
+    player = played.player(game)
+    ui.configure_board(game.rows, game.cols)
+    ui.tweener.clear()
+    surface = pygame.Surface((ui.WIDTH, ui.WINDOW_HEIGHT))
+    renderer = ui.BoardRenderer(surface, present=False)
+    scheduler = Scheduler()
+    frame_ms = 1000 / fps
+    shown = turns is None or 1 in turns
+
+    while True:
+        dt = frame_ms if shown else SKIP_MS
+        ui.animate_cards(dt)
+        scheduler.update(dt)
+
+        # The same decisions as replay_main, once the board has settled
+        if not ui.tweener and not scheduler.pending():
+            if game.is_over():
+                break
+            if game.turn_complete():
+                ui.resolve_turn_handler(game, MODE_VS_PLAYER, scheduler)
+            else:
+                if not game.flipped:
+                    # A turn starts; the last one's cards have finished turning back or fading
+                    shown = turns is None or game.turns + 1 in turns
+                ui.ai_turn_handler(game, player, scheduler)
+
+        if shown:
+            dirty_rects = renderer.render(game.cards, game.player1_score, game.player2_score,
+                                          game.current_player, MODE_VS_PLAYER)
+            writer.write(surface, changed=bool(dirty_rects))
+    return game
+
+def load_theme(theme):
+    """Load a card theme completely before the first frame, so every frame shows it."""
+    ui.theme_loader.load(theme, ui.CARD_SIZE - 2 * ui.SPRITE_MARGIN)
+    while ui.theme_loader.loading():
+        ui.theme_loader.poll()
+        time.sleep(0.001)
+    ui.surface_cache.clear()  # Faces drawn as numbers before the sprites arrived
+
+def render_task(task):
+    """Render one game to its own output; runs in a pool worker or inline."""
+    source, key, options = task
+    ui.app.start()
+    if source == "replay":
+        archive = recording.RecordingArchive(options["archive"])
+        played = archive[key]
+    else:
+        archive = None
+        played = SimulatedGame(options["players"], options["grid_size"],
+                               tournament.game_seed(options["seed"], key))
+    if options["theme"] != themes.NUMBERS_THEME:
+        ui.configure_board(played.rows, played.cols)
+        load_theme(options["theme"])
+    turns = select_turns(played, options["turns"], options["highlights"])
+
+    extension = "" if options["format"] == FORMAT_PNG else f".{options['format']}"
+    path = os.path.join(options["out"], f"game{key}{extension}")
+    start = time.perf_counter()
+    with FrameWriter(path, options["format"], workers=options["workers"]) as writer:
+        game = render_game(played, writer, options["fps"], turns)
+    seconds = time.perf_counter() - start
+    if archive is not None:
+        archive.close()
+    return key, path, writer.count, seconds, game.player1_score, game.player2_score
+
+def report(results, fps):
+    total_frames = 0
+    for key, path, frames, seconds, score1, score2 in results:
+        total_frames += frames
+        print(f"game {key}: {score1}-{score2}, {frames} frames ({frames / fps:.1f} s of clip) "
+              f"in {seconds:.1f} s -> {path}")
+    return total_frames
+
+def main():
+    parser = argparse.ArgumentParser(description="Render games to PNG sequences or raw RGB video, headless.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--replay", metavar="ARCHIVE", help="render games from this recording archive")
+    source.add_argument("--players", nargs=2, choices=sorted(tournament.PLAYERS),
+                        help="simulate games between these two players and render them")
+    parser.add_argument("--game", type=int, nargs="+", default=[0], help="which games of the --replay archive")
+    parser.add_argument("--games", type=int, default=1, help="how many games to simulate with --players")
+    parser.add_argument("--seed", type=int, default=0, help="base seed for simulated games")
+    parser.add_argument("--rows", type=int, default=engine.GRID_SIZE)
+    parser.add_argument("--cols", type=int, default=engine.GRID_SIZE)
+    parser.add_argument("--out", default="clips", help="directory the clips are written to")
+    parser.add_argument("--format", choices=(FORMAT_PNG, FORMAT_RGB), default=FORMAT_PNG,
+                        help="numbered PNGs per game, or one raw rgb24 file per game")
+    parser.add_argument("--fps", type=int, default=FPS)
+    parser.add_argument("--turns", type=parse_turns, help='only draw these turns, e.g. "1-10,40,55-"')
+    parser.add_argument("--highlights", action="store_true", help="only draw turns that end in a match")
+    parser.add_argument("--theme", default=themes.NUMBERS_THEME, choices=themes.list_themes())
+    parser.add_argument("--workers", type=int, default=WRITER_WORKERS, help="PNG writer threads per game")
+    parser.add_argument("--processes", type=int, default=1, help="games rendered at once")
+    args = parser.parse_args()
+
+    options = {
+        "archive": args.replay,
+        "players": args.players,
+        "grid_size": (args.rows, args.cols),
+        "seed": args.seed,
+        "out": args.out,
+        "format": args.format,
+        "fps": args.fps,
+        "turns": args.turns,
+        "highlights": args.highlights,
+        "theme": args.theme,
+        "workers": args.workers,
+    }
+    if args.replay:
+        tasks = [("replay", number, options) for number in args.game]
+    else:
+        tasks = [("simulate", index, options) for index in range(args.games)]
+    os.makedirs(args.out, exist_ok=True)
+
+    start = time.perf_counter()
+    if args.processes > 1 and len(tasks) > 1:
+        with multiprocessing.Pool(args.processes) as pool:
+            results = pool.imap(render_task, tasks)
+            total_frames = report(results, args.fps)
+    else:
+        total_frames = report(map(render_task, tasks), args.fps)
+    seconds = time.perf_counter() - start
+    print(f"{total_frames} frames in {seconds:.1f} s, {total_frames / seconds:.0f} frames/s, "
+          f"{total_frames / args.fps / seconds:.1f}x real time")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""Training data from simulated games: one record per memory AI decision.
+
+Games are played headlessly, and each flip becomes a record. The record holds
+the visible board, the deciding AI's memory, the card it chose, and how the
+turn and the game turned out. Records stream through generators into
+fixed-size chunks. Workers spill each chunk to disk as it fills, and only a
+few tasks run ahead of the writer, so memory stays bounded however big the
+dataset gets. Each column of a chunk is saved as its own .npy file. Read the
+chunks back memory-mapped with Dataset.
+
+Usage: python dataset.py --games 100000 --out-dir data
+"""
+import argparse
+import collections
+import json
+import multiprocessing
+import os
+import random
+
+import numpy as np
+
+import engine
+from tournament import game_seed
+
+CHUNK_RECORDS = 1 << 20  # Records per chunk file
+CHUNK_BYTES = 256 << 20  # Fewer records per chunk on boards where CHUNK_RECORDS would be bigger than this
+GAMES_PER_TASK = 200
+TASKS_AHEAD = 2  # Tasks queued per worker beyond the one being written
+METADATA_FILE = "metadata.json"
+SPILL_DIR = "spill"  # Under the output directory; worker chunks wait here for the writer
+
+# Board cell codes in the "board" column; face-up cards show their value
+CELL_FACE_DOWN = 0
+CELL_MATCHED = -1
+
+def columns(cell_count):
+    """{column: (dtype, shape of one record)}"""
+    return {
+        "game": (np.int64, ()),
+        "turn": (np.int32, ()),
+        "step": (np.int8, ()),  # 0, 1 or 2: flips already made this turn
+        "player": (np.int8, ()),
+        "board": (np.int16, (cell_count,)),  # CELL_* code or the face-up value
+        "memory": (np.int16, (cell_count,)),  # Remembered value, 0 if not remembered
+        "choice": (np.int32, ()),  # Index of the card flipped
+        "turn_matched": (np.bool_, ()),
+        "final_margin": (np.int16, ()),  # Decider's final score minus the opponent's
+    }
+
+def chunk_size(cell_count, chunk_records=CHUNK_RECORDS):
+    """Records per chunk: chunk_records, or fewer if that many would pass CHUNK_BYTES."""
+    record_bytes = sum(np.dtype(dtype).itemsize * int(np.prod(shape))
+                       for dtype, shape in columns(cell_count).values())
+    return max(1, min(chunk_records, CHUNK_BYTES // record_bytes))
+
+def decisions(game_index, seed, grid_size=engine.GRID_SIZE, limits=None):
+    """Play one memory AI game and yield a record dict per flip."""
+    rng = random.Random(seed)
+    game = engine.Game(grid_size, rng)
+    players = [engine.MemoryAI(rng, **(limits or {})) for _ in range(2)]
+    game.observers.extend(players)
+    cell_count = game.rows * game.cols
+    board = np.zeros(cell_count, dtype=np.int16)
+
+    records = []  # Outcomes are only known once the game ends
+    while not game.is_over():
+        player = players[game.current_player - 1]
+        turn_records = []
+        while not game.turn_complete():
+            memory = np.zeros(cell_count, dtype=np.int16)
+            for index, (card, _) in player.memory.recent.items():
+                memory[index] = card.value
+            record = {"game": game_index, "turn": game.turns, "step": len(game.flipped),
+                      "player": game.current_player, "board": board.copy(), "memory": memory}
+            card = player.choose_card(game.board, game.flipped)
+            if not game.flip(card):
+                break
+            record["choice"] = card.index
+            turn_records.append(record)
+            board[card.index] = card.value
+
+        flipped = game.flipped
+        matched = game.resolve_turn()
+        for card in flipped:
+            board[card.index] = CELL_MATCHED if matched else CELL_FACE_DOWN
+        for record in turn_records:
+            record["turn_matched"] = matched
+        records.extend(turn_records)
+
+    for record in records:
+        scores = game.scores if record["player"] == 1 else game.scores[::-1]
+        record["final_margin"] = scores[0] - scores[1]
+        yield record
+
+def chunks(records, cell_count, chunk_records=CHUNK_RECORDS):
+    """Pack a stream of records into {column: array} chunks of chunk_records rows."""
+    layout = columns(cell_count)
+    def empty():
+        return {name: np.empty((chunk_records,) + shape, dtype) for name, (dtype, shape) in layout.items()}
+
+    chunk = empty()
+    filled = 0
+    for record in records:
+        for name, array in chunk.items():
+            array[filled] = record[name]
+        filled += 1
+        if filled == chunk_records:
+            yield chunk
+            chunk = empty()
+            filled = 0
+    if filled:
+        yield {name: array[:filled] for name, array in chunk.items()}
+
+def play_task(task):
+    """Play games [start, start + count) in a worker and spill their chunks; returns the file prefixes."""
+    start, count, base_seed, grid_size, limits, spill_dir, chunk_records = task
+    rows, cols = engine.board_shape(grid_size)
+    records = (record for game_index in range(start, start + count)
+               for record in decisions(game_index, game_seed(base_seed, game_index), grid_size, limits))
+    prefixes = []
+    for number, chunk in enumerate(chunks(records, rows * cols, chunk_records)):
+        prefix = os.path.join(spill_dir, f"{start:010d}-{number:05d}")
+        for name, array in chunk.items():
+            np.save(f"{prefix}-{name}.npy", array)
+        prefixes.append(prefix)
+    return prefixes
+
+def load_spilled(prefix, names):
+    """Read back one spilled chunk and delete its files."""
+    chunk = {}
+    for name in names:
+        path = f"{prefix}-{name}.npy"
+        chunk[name] = np.load(path)
+        os.remove(path)
+    return chunk
+
+def ordered_results(pool, tasks, ahead):
+    """play_task results in task order, with at most `ahead` tasks queued or running at once."""
+    pending = collections.deque()
+    for task in tasks:
+        pending.append(pool.apply_async(play_task, (task,)))
+        if len(pending) >= ahead:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+def rechunk(column_batches, cell_count, chunk_records=CHUNK_RECORDS):
+    """Regroup column batches of any size into chunks of chunk_records rows."""
+    layout = columns(cell_count)
+    chunk = {name: np.empty((chunk_records,) + shape, dtype) for name, (dtype, shape) in layout.items()}
+    filled = 0
+    for batch in column_batches:
+        size = len(batch["game"])
+        start = 0
+        while start < size:
+            take = min(size - start, chunk_records - filled)
+            for name, array in chunk.items():
+                array[filled:filled + take] = batch[name][start:start + take]
+            filled += take
+            start += take
+            if filled == chunk_records:
+                yield chunk  # Written out before the next batch overwrites it
+                filled = 0
+    if filled:
+        yield {name: array[:filled] for name, array in chunk.items()}
+
+class ChunkWriter:
+    """Writes chunks as <column>-<chunk>.npy files plus a metadata file."""
+    def __init__(self, out_dir, grid_size=engine.GRID_SIZE):
+        self.out_dir = out_dir
+        self.rows, self.cols = engine.board_shape(grid_size)
+        self.chunk_sizes = []
+        os.makedirs(out_dir, exist_ok=True)
+
+    def write(self, chunk):
+        number = len(self.chunk_sizes)
+        for name, array in chunk.items():
+            np.save(os.path.join(self.out_dir, f"{name}-{number:05d}.npy"), array)
+        self.chunk_sizes.append(len(chunk["game"]))
+
+    def close(self):
+        metadata = {
+            "rows": self.rows, "cols": self.cols,
+            "columns": list(columns(self.rows * self.cols)),
+            "chunk_sizes": self.chunk_sizes,
+            "records": sum(self.chunk_sizes),
+        }
+        with open(os.path.join(self.out_dir, METADATA_FILE), "w") as f:
+            json.dump(metadata, f, indent=2)
+
+def export(out_dir, games, grid_size=engine.GRID_SIZE, seed=0, difficulty="hard",
+           workers=None, chunk_records=CHUNK_RECORDS):
+    """Play `games` games and write every decision to out_dir; returns the record count."""
+    rows, cols = engine.board_shape(grid_size)
+    limits = engine.AI_DIFFICULTIES[difficulty]
+    chunk_records = chunk_size(rows * cols, chunk_records)
+    workers = workers or os.cpu_count() or 1
+    writer = ChunkWriter(out_dir, grid_size)
+    spill_dir = os.path.join(out_dir, SPILL_DIR)
+    os.makedirs(spill_dir, exist_ok=True)
+    tasks = ((start, min(GAMES_PER_TASK, games - start), seed, grid_size, limits, spill_dir, chunk_records)
+             for start in range(0, games, GAMES_PER_TASK))
+    names = list(columns(rows * cols))
+
+    def batches(results):
+        for prefixes in results:
+            for prefix in prefixes:
+                yield load_spilled(prefix, names)
+
+    if workers == 1:
+        for chunk in rechunk(batches(map(play_task, tasks)), rows * cols, chunk_records):
+            writer.write(chunk)
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            # Results come back in game order whichever worker finishes first
+            results = ordered_results(pool, tasks, workers * (1 + TASKS_AHEAD))
+            for chunk in rechunk(batches(results), rows * cols, chunk_records):
+                writer.write(chunk)
+    os.rmdir(spill_dir)
+    writer.close()
+    return sum(writer.chunk_sizes)
+
+class Dataset:
+    """Memory-mapped view of an exported dataset, one chunk at a time."""
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, METADATA_FILE)) as f:
+            self.metadata = json.load(f)
+
+    def __len__(self):
+        return self.metadata["records"]
+
+    def column(self, name, chunk):
+        return np.load(os.path.join(self.path, f"{name}-{chunk:05d}.npy"), mmap_mode="r")
+
+    def chunks(self, names=None):
+        """Yield {column: memory-mapped array} for every chunk."""
+        names = names or self.metadata["columns"]
+        for chunk in range(len(self.metadata["chunk_sizes"])):
+            yield {name: self.column(name, chunk) for name in names}
+
+def main():
+    parser = argparse.ArgumentParser(description="Export memory AI decisions as NumPy training data.")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--grid-size", type=int, default=engine.GRID_SIZE)
+    parser.add_argument("--difficulty", default="hard", choices=sorted(engine.AI_DIFFICULTIES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="default: one per CPU core")
+    parser.add_argument("--chunk-records", type=int, default=CHUNK_RECORDS)
+    parser.add_argument("--out-dir", default="data")
+    args = parser.parse_args()
+
+    records = export(args.out_dir, args.games, args.grid_size, args.seed, args.difficulty,
+                     args.workers, args.chunk_records)
+    print(f"{records} decisions from {args.games} games -> {args.out_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,464 @@
+"""Headless rules for the 3-card Memory Match Game.
+
+Nothing in here imports pygame, so boards can be set up, played and scored
+as fast as the CPU allows. game.py is a thin pygame front-end over it.
+"""
+import random
+from collections import OrderedDict
+
+# Board Constants
+GRID_SIZE = 6
+MATCH_SIZE = 3  # Cards needed for a match
+
+# Game Modes
+MODE_VS_AI = 0
+MODE_VS_PLAYER = 1
+
+# Card states (the flipping/fading states are only used by the UI)
+CARD_STATE_HIDDEN = 0
+CARD_STATE_FLIPPING_UP = 1
+CARD_STATE_REVEALED = 2
+CARD_STATE_FLIPPING_DOWN = 3
+CARD_STATE_MATCHED_FADING = 4
+CARD_STATE_MATCHED = 5
+
+REVEALED_STATES = (CARD_STATE_REVEALED, CARD_STATE_FLIPPING_UP, CARD_STATE_FLIPPING_DOWN)
+MATCHED_STATES = (CARD_STATE_MATCHED, CARD_STATE_MATCHED_FADING)
+# bytes.translate table from any state to the one its animation ends in
+SETTLED_STATES = bytes.maketrans(
+    bytes((CARD_STATE_FLIPPING_UP, CARD_STATE_FLIPPING_DOWN, CARD_STATE_MATCHED_FADING)),
+    bytes((CARD_STATE_REVEALED, CARD_STATE_HIDDEN, CARD_STATE_MATCHED)))
+
+class IndexedSet:
+    """Set with O(1) add, discard and random choice."""
+    def __init__(self, items=()):
+        self.items = []
+        self.positions = {}  # {item: index in self.items}
+        for item in items:
+            self.add(item)
+
+    def add(self, item):
+        if item not in self.positions:
+            self.positions[item] = len(self.items)
+            self.items.append(item)
+
+    def discard(self, item):
+        position = self.positions.pop(item, None)
+        if position is None:
+            return
+        # Fill the hole with the last item instead of shifting the list
+        last = self.items.pop()
+        if last is not item:
+            self.items[position] = last
+            self.positions[last] = position
+
+    def choice(self, rng):
+        return rng.choice(self.items)
+
+    def __contains__(self, item):
+        return item in self.positions
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+class BoardIndex:
+    """Cards grouped by state, updated by each card as its state changes."""
+    def __init__(self, cards=()):
+        self.states = bytearray()  # One byte per card index, so a snapshot is a flat copy
+        self.hidden = IndexedSet()  # Cards that can be flipped
+        # Dicts used as insertion-ordered sets
+        self.revealed = {}
+        self.matched = {}
+        self.groups = (
+            (self.revealed, REVEALED_STATES),
+            (self.matched, MATCHED_STATES),
+        )
+        for card in cards:
+            card.board = self
+            self.update(card, None, card.state)
+
+    def update(self, card, old_state, new_state):
+        if card.index >= len(self.states):
+            self.states.extend(bytes(card.index + 1 - len(self.states)))
+        self.states[card.index] = new_state
+        if old_state == CARD_STATE_HIDDEN:
+            self.hidden.discard(card)
+        elif new_state == CARD_STATE_HIDDEN:
+            self.hidden.add(card)
+
+        for group, states in self.groups:
+            if old_state in states and new_state not in states:
+                del group[card]
+            elif new_state in states and old_state not in states:
+                group[card] = None
+
+    @property
+    def matched_count(self):
+        return len(self.matched)
+
+class Card:
+    __slots__ = ("value", "row", "col", "index", "board", "_state")
+
+    def __init__(self, value, row, col, index=0):
+        self.value = value
+        self.row = row
+        self.col = col
+        self.index = index
+        self.board = None  # BoardIndex kept up to date with this card's state
+        self._state = CARD_STATE_HIDDEN
+
+    @property
+    def state(self):
+        return self._state
+
+    @state.setter
+    def state(self, state):
+        old_state = self._state
+        self._state = state
+        if self.board is not None and state != old_state:
+            self.board.update(self, old_state, state)
+
+    def is_revealed(self):
+        return self.state in REVEALED_STATES
+
+    def is_matched(self):
+        return self.state in MATCHED_STATES
+
+    def is_available(self):
+        return self.state == CARD_STATE_HIDDEN
+
+    def flip_up(self):
+        if self.state == CARD_STATE_HIDDEN:
+            self.state = CARD_STATE_REVEALED
+
+    def flip_down(self):
+        if self.state == CARD_STATE_REVEALED:
+            self.state = CARD_STATE_HIDDEN
+
+    def set_matched(self):
+        if self.state == CARD_STATE_REVEALED:
+            self.state = CARD_STATE_MATCHED
+
+def board_shape(grid_size):
+    """(rows, cols) from a side length or a (rows, cols) pair."""
+    if isinstance(grid_size, int):
+        return grid_size, grid_size
+    rows, cols = grid_size
+    return rows, cols
+
+def setup_board(grid_size=GRID_SIZE, rng=random, card_factory=Card, values=None):
+    """Create a shuffled board of card triplets, or lay out the given values.
+
+    grid_size is a side length or a (rows, cols) pair. Cells left over after
+    dealing whole triplets stay empty at the end of the last row.
+    """
+    # For a 6x6 grid with 3 matching cards, we need 12 unique values, each repeated 3 times
+    rows, cols = board_shape(grid_size)
+    if values is None:
+        card_values = list(range(1, (rows * cols // MATCH_SIZE) + 1)) * MATCH_SIZE
+        rng.shuffle(card_values)
+    else:
+        card_values = list(values)  # A saved game's board
+
+    cards = []
+    for index, value in enumerate(card_values):
+        row, col = divmod(index, cols)
+        cards.append(card_factory(value, row, col, index))
+    return cards
+
+# Memory limits per AI difficulty (None means unlimited)
+AI_DIFFICULTIES = {
+    "easy": {"capacity": 6, "max_age": 4},
+    "medium": {"capacity": 12, "max_age": 10},
+    "hard": {"capacity": None, "max_age": None},
+}
+
+class AIMemory:
+    """Where the AI has seen each value, with optional capacity and age limits.
+
+    Every operation touches at most MATCH_SIZE positions for one value, so
+    cost doesn't grow with the board. Over capacity, the least recently seen
+    card is forgotten (LRU); cards not seen for max_age turns decay away.
+    """
+    def __init__(self, capacity=None, max_age=None):
+        self.capacity = capacity
+        self.max_age = max_age
+        self.turn = 0
+        self.recent = OrderedDict()  # {card_index: (card, turn_seen)}, least recently seen first
+        self.positions = {}  # {card_value: [card_index, ...]}
+        self.complete = {}  # Values with MATCH_SIZE remembered cards, used as an ordered set
+
+    def remember(self, card):
+        seen = card.index in self.recent
+        self.recent.pop(card.index, None)
+        self.recent[card.index] = (card, self.turn)
+        if not seen:
+            positions = self.positions.setdefault(card.value, [])
+            positions.append(card.index)
+            if len(positions) >= MATCH_SIZE:
+                self.complete[card.value] = None
+        self.evict()
+
+    def discard(self, index):
+        """Forget a single card."""
+        card, _ = self.recent.pop(index)
+        positions = self.positions[card.value]
+        positions.remove(index)
+        if len(positions) < MATCH_SIZE:
+            self.complete.pop(card.value, None)
+        if not positions:
+            del self.positions[card.value]
+
+    def forget(self, value):
+        """Forget every card of a value, e.g. once it has been matched."""
+        for index in self.positions.pop(value, ()):
+            del self.recent[index]
+        self.complete.pop(value, None)
+
+    def cards(self, value):
+        return [self.recent[index][0] for index in self.positions.get(value, ())]
+
+    def known_match(self):
+        """Return three remembered, unmatched cards of one value, or None."""
+        for value in self.complete:
+            valid_cards = [card for card in self.cards(value) if not card.is_matched()]
+            if len(valid_cards) >= MATCH_SIZE:
+                return valid_cards[:MATCH_SIZE]
+        return None
+
+    def end_turn(self):
+        self.turn += 1
+        self.evict()
+
+    def snapshot(self):
+        """(turn, ((card_index, turn_seen), ...)) in recency order; no card objects."""
+        return self.turn, tuple((index, turn_seen) for index, (_, turn_seen) in self.recent.items())
+
+    def restore(self, snapshot, cards):
+        """Go back to a snapshot(), looking the remembered cards up in `cards`."""
+        self.turn, seen = snapshot
+        self.recent.clear()
+        self.positions.clear()
+        self.complete.clear()
+        for index, turn_seen in seen:
+            card = cards[index]
+            self.recent[index] = (card, turn_seen)
+            positions = self.positions.setdefault(card.value, [])
+            positions.append(index)
+            if len(positions) >= MATCH_SIZE:
+                self.complete[card.value] = None
+
+    def evict(self):
+        while self.capacity is not None and len(self.recent) > self.capacity:
+            self.discard(next(iter(self.recent)))
+        while self.max_age is not None and self.recent:
+            index, (card, turn_seen) = next(iter(self.recent.items()))
+            if self.turn - turn_seen <= self.max_age:
+                break
+            self.discard(index)
+
+    def __len__(self):
+        return len(self.recent)
+
+class MemoryAI:
+    """Remembers cards it sees and uses that to pick flips."""
+    def __init__(self, rng=random, capacity=None, max_age=None):
+        self.rng = rng
+        self.memory = AIMemory(capacity, max_age)
+
+    def remember(self, card):
+        self.memory.remember(card)
+
+    def forget(self, value):
+        self.memory.forget(value)
+
+    def end_turn(self):
+        self.memory.end_turn()
+
+    def known_match(self):
+        return self.memory.known_match()
+
+    def choose_card(self, board, flipped):
+        """Pick the next card to flip given the cards flipped so far this turn."""
+        if not flipped:
+            # Play a known match if there is one
+            potential_match = self.known_match()
+            if potential_match:
+                return potential_match[0]
+        elif all(card.value == flipped[0].value for card in flipped):
+            # Still on track for a match, follow up from memory
+            for card in self.memory.cards(flipped[0].value):
+                if card.is_available():
+                    return card
+
+        # No match in memory, pick randomly
+        if not board.hidden:
+            return None
+        return board.hidden.choice(self.rng)
+
+class RandomPlayer:
+    """Scripted opponent with no memory at all."""
+    def __init__(self, rng=random):
+        self.rng = rng
+
+    def choose_card(self, board, flipped):
+        if not board.hidden:
+            return None
+        return board.hidden.choice(self.rng)
+
+class GameState:
+    """Everything that changes during a game, from Game.snapshot().
+
+    Card values never change, so they aren't copied; the card states are one
+    flat bytes copy and the rest are small tuples, all immutable, so a state
+    can be kept or shared for as long as needed.
+    """
+    __slots__ = ("states", "scores", "current_player", "turns", "flipped", "memories")
+
+    def __init__(self, states, scores, current_player, turns, flipped, memories):
+        self.states = states  # bytes, one settled card state per card index
+        self.scores = scores
+        self.current_player = current_player
+        self.turns = turns
+        self.flipped = flipped  # Card indices flipped so far this turn
+        self.memories = memories  # AIMemory.snapshot() per observer, None for those without memory
+
+class Game:
+    """Board, turn order and scores for one game."""
+    def __init__(self, grid_size=GRID_SIZE, rng=None, card_factory=Card, values=None):
+        self.rng = rng if rng is not None else random.Random()
+        self.rows, self.cols = board_shape(grid_size)
+        self.cards = setup_board(grid_size, self.rng, card_factory, values)
+        self.board = BoardIndex(self.cards)
+        self.scores = [0, 0]
+        self.current_player = 1  # Player 1 or human player goes first
+        self.turns = 0
+        self.flipped = []  # Cards flipped so far this turn
+        self.observers = []  # AIs that see every flip (remember/forget/end_turn)
+
+    @property
+    def player1_score(self):
+        return self.scores[0]
+
+    @property
+    def player2_score(self):
+        return self.scores[1]
+
+    def flip(self, card):
+        """Flip a hidden card as part of the current turn."""
+        if card is None or not card.is_available() or self.turn_complete():
+            return False
+        card.flip_up()
+        self.flipped.append(card)
+        for observer in self.observers:
+            observer.remember(card)
+        return True
+
+    def turn_complete(self):
+        return len(self.flipped) >= MATCH_SIZE
+
+    def is_match(self):
+        return (self.turn_complete() and
+                all(card.value == self.flipped[0].value for card in self.flipped))
+
+    def resolve_turn(self):
+        """Score the flipped cards and return True if the player goes again."""
+        flipped = self.flipped
+        matched = self.is_match()
+        self.flipped = []
+        self.turns += 1
+        for observer in self.observers:
+            observer.end_turn()
+
+        if matched:
+            for card in flipped:
+                card.set_matched()
+            self.scores[self.current_player - 1] += 1
+            for observer in self.observers:
+                observer.forget(flipped[0].value)
+            return True  # Player gets another turn and 1 point
+
+        for card in flipped:
+            card.flip_down()
+        self.current_player = 2 if self.current_player == 1 else 1
+        return False
+
+    @property
+    def matched_count(self):
+        return self.board.matched_count
+
+    def is_over(self):
+        return self.matched_count == len(self.cards)
+
+    def snapshot(self):
+        """GameState to restore() later; cards mid-animation count as where they are heading."""
+        return GameState(bytes(self.board.states).translate(SETTLED_STATES), tuple(self.scores),
+                         self.current_player, self.turns, tuple(card.index for card in self.flipped),
+                         tuple(observer.memory.snapshot() if hasattr(observer, "memory") else None
+                               for observer in self.observers))
+
+    def restore(self, state):
+        """Put the board, scores, turn and AI memories back as they were in a snapshot()."""
+        cards = self.cards
+        for index, (current, saved) in enumerate(zip(self.board.states, state.states)):
+            if current != saved:
+                cards[index].state = saved
+        self.scores = list(state.scores)
+        self.current_player = state.current_player
+        self.turns = state.turns
+        self.flipped = [cards[index] for index in state.flipped]
+        for observer, memory in zip(self.observers, state.memories):
+            if memory is not None:
+                observer.memory.restore(memory, cards)
+            if hasattr(observer, "rebuild"):
+                observer.rebuild(self.board)  # Observers with state derived from their memory
+
+class History:
+    """Undo and redo stacks of GameState snapshots."""
+    def __init__(self):
+        self.undo_states = []
+        self.redo_states = []
+
+    def push(self, state):
+        """Remember a state to undo back to; a new move drops anything that could be redone."""
+        self.undo_states.append(state)
+        self.redo_states.clear()
+
+    def undo(self, current):
+        """The last pushed state, or None; `current` becomes the next redo."""
+        if not self.undo_states:
+            return None
+        self.redo_states.append(current)
+        return self.undo_states.pop()
+
+    def redo(self, current):
+        """The state the last undo() left, or None; `current` can be undone to again."""
+        if not self.redo_states:
+            return None
+        self.undo_states.append(current)
+        return self.redo_states.pop()
+
+    def clear(self):
+        self.undo_states.clear()
+        self.redo_states.clear()
+
+def play_game(players=(MemoryAI, MemoryAI), grid_size=GRID_SIZE, seed=None, observers=()):
+    """Play a whole game between two player classes without any rendering."""
+    rng = random.Random(seed)
+    game = Game(grid_size, rng)
+    opponents = [player(rng) for player in players]
+    for opponent in opponents:
+        if hasattr(opponent, "remember"):
+            game.observers.append(opponent)
+    game.observers.extend(observers)  # e.g. a recording.GameRecorder
+
+    while not game.is_over():
+        opponent = opponents[game.current_player - 1]
+        while not game.turn_complete():
+            if not game.flip(opponent.choose_card(game.board, game.flipped)):
+                break
+        game.resolve_turn()
+    return game
@@ -1,54 +1,249 @@
+import time
+
+STARTED = time.perf_counter()  # Launch reference for the startup time, taken before the pygame import
+
 import pygame
 import random
-import time
 import math
 
-# Initialize pygame
-pygame.init()
+import engine
+import hints
+import montecarlo
+import recording
+import savegame
+import solver
+import stats
+import themes
+from camera import Camera
+from profiler import Profiler
+from scheduler import Scheduler
+from spatial import GridLayout
+from surfaces import SurfaceCache
+from tween import Tweener, ease_in_out, ease_out, ease_out_back
+from engine import (
+    GRID_SIZE,
+    MODE_VS_AI,
+    MODE_VS_PLAYER,
+    CARD_STATE_HIDDEN,
+    CARD_STATE_FLIPPING_UP,
+    CARD_STATE_REVEALED,
+    CARD_STATE_FLIPPING_DOWN,
+    CARD_STATE_MATCHED_FADING,
+    CARD_STATE_MATCHED,
+)
 
 # Game Constants
 WIDTH, HEIGHT = 800, 800
-GRID_SIZE = 6
 CARD_SPACING = 10  # Added spacing between cards
 CARD_SIZE = (WIDTH - (GRID_SIZE + 1) * CARD_SPACING) // GRID_SIZE  # Adjusted for spacing
-FONT = pygame.font.Font(None, 60)
-SMALL_FONT = pygame.font.Font(None, 36)
-TITLE_FONT = pygame.font.Font(None, 72)
-MENU_FONT = pygame.font.Font(None, 48)
+MIN_CARD_SIZE = 60  # Boards that don't fit at this size scroll instead
+MARATHON_GRID_SIZE = (100, 100)
+AI_DIFFICULTY = "hard"  # Key into engine.AI_DIFFICULTIES, "expert" for the solver or "montecarlo"
+# Font sizes; the fonts themselves are loaded on first use by App.font
+FONT = 60
+SMALL_FONT = 36
+TITLE_FONT = 72
+MENU_FONT = 48
+WINNER_FONT = 54
+OVERLAY_FONT = 18
 BG_COLOR = (30, 30, 30)
 CARD_COLOR = (200, 200, 200)
 CARD_BACK_COLOR = (100, 149, 237)  # Cornflower blue
 TEXT_COLOR = (255, 255, 255)
 BUTTON_COLOR = (80, 120, 200)
 BUTTON_HOVER_COLOR = (100, 140, 220)
+HINT_COLOR = (255, 165, 0)  # Tint of a card back at 100% match odds
+HINT_MAX_ALPHA = 200
+HINT_VALUES = 3  # Likeliest values listed on each face-down card in training mode
 SCORE_PANEL_HEIGHT = 50
 WINDOW_HEIGHT = HEIGHT + SCORE_PANEL_HEIGHT
 
-# Animation Constants
-FLIP_SPEED = 10
-MATCH_FADE_SPEED = 5
-ANIMATION_DELAY = 30
+# Animation Constants (milliseconds)
+FLIP_DURATION = 300
+MATCH_FADE_DURATION = 600
+DEAL_DURATION = 450  # Each card's slide into place at the start of a game
+DEAL_SPREAD = 400  # Delay between the first and the last card dealt
+PEEK_TIME = 0  # Every card shown this long at the start of a game (--peek); 0 for none
+PEEK_SPREAD = 300  # Delay between the first and the last card turning in a peek
+AI_FLIP_DELAY = 500
+FLIP_BACK_DELAY = 1000
+FRAME_RATE = 60
+AI_POLL_INTERVAL = 1000 // FRAME_RATE  # Check on a thinking AI once a frame
+FADE_STEPS = 20  # Alpha levels baked for fading cards
+SCROLL_SPEED = 800  # Pixels per second while an arrow key is held
+SCROLL_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN)
+IDLE_FRAME_RATE = 20  # While nothing moves, a click waits up to 50 ms to be seen
+DEEP_IDLE_FRAME_RATE = 10  # Once nothing has happened for DEEP_IDLE_AFTER; a click then waits up to 100 ms
+DEEP_IDLE_AFTER = 30  # Seconds
+
+# Surface cache Constants
+SURFACE_CACHE_SIZE = 512
+SURFACES_PER_CARD = 2  # Cache entries a card in view can hold at once: its face and its (hint) back
+CARD_THEME = "numbers"
+SPRITE_MARGIN = 8  # Space between a theme image and the card edge
+
+class App:
+    """Window, fonts and board renderer, created when first needed instead of at import.
+
+    Importing this module opens no window and initializes nothing, so tools
+    and simulators can use it without a display; the entry points call start().
+    """
+    def __init__(self):
+        self.screen = None
+        self.board_renderer = None
+        self.fonts = {}  # {size: pygame font}
+        self.startup_time = None  # Seconds from STARTED to the first menu frame
+    
+    def start(self):
+        """Initialize only the display and font modules and open the window."""
+        if self.screen is not None:
+            return
+        pygame.display.init()
+        pygame.font.init()
+        self.screen = pygame.display.set_mode((WIDTH, WINDOW_HEIGHT))
+        pygame.display.set_caption("Memory Match Game - 3 Card Matching")
+        self.board_renderer = BoardRenderer(self.screen)
+    
+    def font(self, size):
+        if size not in self.fonts:
+            self.fonts[size] = pygame.font.Font(None, size)
+        return self.fonts[size]
+    
+    def menu_shown(self):
+        """Note the startup time once the first menu frame is on screen."""
+        if self.startup_time is None:
+            self.startup_time = time.perf_counter() - STARTED
+    
+    def quit(self):
+        # Fonts and converted surfaces belong to this display
+        surface_cache.clear()
+        theme_loader.close()
+        self.fonts.clear()
+        self.screen = None
+        self.board_renderer = None
+        pygame.quit()
 
-# Create Game Window
-screen = pygame.display.set_mode((WIDTH, WINDOW_HEIGHT))
-pygame.display.set_caption("Memory Match Game - 3 Card Matching")
+app = App()
 
 # Game States
 STATE_MENU = 0
 STATE_PLAYING = 1
 STATE_GAME_OVER = 2
 
-# Game Modes
-MODE_VS_AI = 0
-MODE_VS_PLAYER = 1
+def configure_board(rows, cols):
+    """Size the cards, layout and camera for a rows x cols board."""
+    global CARD_SIZE, board_layout, camera
+    
+    # Fit the board in the window if the cards stay big enough, otherwise scroll
+    fit_size = min((WIDTH - (cols + 1) * CARD_SPACING) // cols,
+                   (HEIGHT - (rows + 1) * CARD_SPACING) // rows)
+    CARD_SIZE = max(MIN_CARD_SIZE, fit_size)
+    
+    # Board layout in board coordinates, used for O(1) card picking and culling
+    board_layout = GridLayout(rows, cols, CARD_SIZE, CARD_SPACING)
+    camera = Camera(WIDTH, HEIGHT, board_layout.width, board_layout.height)
+    
+    # Theme images at the new card size; loads in the background, numbers show meanwhile
+    theme_loader.load(theme_loader.theme, CARD_SIZE - 2 * SPRITE_MARGIN)
+
+# Card face images for the theme picked in the menu; no threads start until one is picked
+theme_loader = themes.ThemeLoader()
+configure_board(GRID_SIZE, GRID_SIZE)
+
+# Pre-rendered text, card faces and fade steps
+surface_cache = SurfaceCache(SURFACE_CACHE_SIZE)
+
+# Card flips, fades and slides in flight; a frame only visits these
+tweener = Tweener()
+
+# Frame phase timings; off unless --profile is given or the overlay is shown (F3)
+profiler = Profiler()
+# Appends every game played to an archive when --record is given
+recording_writer = None
+# Saves every finished game and keeps the totals shown on the menu and game over screens
+stats_store = None
+# Undo and redo with Ctrl+Z and Ctrl+Y when --practice is given; those games aren't saved or recorded
+practice_mode = False
+# Where Ctrl+S saves the game in progress and --resume picks it up
+save_path = savegame.SAVE_PATH
+# Training mode (--hints): each unseen face-down card shows its likeliest values and the odds that flipping it makes a match
+show_hints = False
+hint_overlay = None  # HintOverlay of the current game while show_hints is on
+
+CARD_STATE_NAMES = {
+    CARD_STATE_HIDDEN: "hidden",
+    CARD_STATE_FLIPPING_UP: "flipping up",
+    CARD_STATE_REVEALED: "revealed",
+    CARD_STATE_FLIPPING_DOWN: "flipping down",
+    CARD_STATE_MATCHED_FADING: "matched fading",
+    CARD_STATE_MATCHED: "matched",
+}
+
+def render_text(font, text, color):
+    """Render text in a font size once and reuse the surface while it stays cached."""
+    return surface_cache.get(("text", font, text, color),
+                             lambda: app.font(font).render(text, True, color).convert_alpha())
+
+def get_card_back(size=None):
+    """Card back with its border, at the current card size unless given."""
+    size = size or CARD_SIZE
+    def build():
+        back = pygame.Surface((size, size)).convert()
+        back.fill(CARD_BACK_COLOR)
+        pygame.draw.rect(back, (0, 0, 0), back.get_rect(), 3)
+        return back
+    return surface_cache.get(("back", size, CARD_THEME), build)
 
-# Card animation states
-CARD_STATE_HIDDEN = 0
-CARD_STATE_FLIPPING_UP = 1
-CARD_STATE_REVEALED = 2
-CARD_STATE_FLIPPING_DOWN = 3
-CARD_STATE_MATCHED_FADING = 4
-CARD_STATE_MATCHED = 5
+def get_hint_back(hint, size=None):
+    """Card back tinted by its match odds, with the odds and its likeliest values written on it."""
+    size = size or CARD_SIZE
+    percent, likely = hint
+    def build():
+        back = get_card_back(size).copy()
+        tint = pygame.Surface((size, size)).convert()
+        tint.fill(HINT_COLOR)
+        tint.set_alpha(HINT_MAX_ALPHA * percent // 100)
+        back.blit(tint, (0, 0))
+        pygame.draw.rect(back, (0, 0, 0), back.get_rect(), 3)
+        lines = [render_text(OVERLAY_FONT, f"match {percent}%", TEXT_COLOR)]
+        lines += [render_text(OVERLAY_FONT, f"{value}: {chance}%", TEXT_COLOR) for value, chance in likely]
+        # Zoomed out, the lines that don't fit are left off, down to the tint alone
+        while lines and (max(line.get_width() for line in lines) > size - 6
+                         or sum(line.get_height() for line in lines) > size - 6):
+            lines.pop()
+        y = (size - sum(line.get_height() for line in lines)) // 2
+        for line in lines:
+            back.blit(line, line.get_rect(midtop=(size // 2, y)))
+            y += line.get_height()
+        return back
+    return surface_cache.get(("hint", size, hint, CARD_THEME), build)
+
+def get_card_face(value, fade_step=0, size=None):
+    """Card front for value, faded out by fade_step of FADE_STEPS."""
+    size = size or CARD_SIZE
+    sprite = theme_loader.sprite(value)  # None until the theme image has loaded
+    def build():
+        if fade_step:
+            face = get_card_face(value, 0, size).copy()
+            face.set_alpha(255 * (FADE_STEPS - fade_step) // FADE_STEPS)
+            return face
+        if size != CARD_SIZE:
+            # Zoomed cards are scaled from the full-size face
+            return pygame.transform.smoothscale(get_card_face(value), (size, size))
+        face = pygame.Surface((size, size)).convert()
+        face.fill(CARD_COLOR)
+        if sprite is not None:
+            face.blit(sprite, sprite.get_rect(center=face.get_rect().center))
+            return face
+        text = render_text(FONT, str(value), (0, 0, 0))
+        if text.get_width() > size - 10:
+            # Long values on big boards are shrunk to fit the card
+            scale = (size - 10) / text.get_width()
+            text = pygame.transform.smoothscale(text, (size - 10, int(text.get_height() * scale)))
+        face.blit(text, text.get_rect(center=face.get_rect().center))
+        return face
+    theme = theme_loader.theme if sprite is not None else themes.NUMBERS_THEME
+    return surface_cache.get(("face", value, size, fade_step, theme), build)
 
 class Button:
     def __init__(self, x, y, width, height, text):
@@ -61,7 +256,7 @@ class Button:
         pygame.draw.rect(surface, color, self.rect, border_radius=10)
         pygame.draw.rect(surface, (255, 255, 255), self.rect, 3, border_radius=10)
         
-        text = MENU_FONT.render(self.text, True, TEXT_COLOR)
+        text = render_text(MENU_FONT, self.text, TEXT_COLOR)
         text_rect = text.get_rect(center=self.rect.center)
         surface.blit(text, text_rect)
         
@@ -72,594 +267,921 @@ class Button:
     def is_clicked(self, pos):
         return self.rect.collidepoint(pos)
 
-class Card:
-    def __init__(self, value, row, col):
-        self.value = value
-        self.row = row
-        self.col = col
-        self.state = CARD_STATE_HIDDEN
-        self.flip_progress = 0  # 0 to 100
+class Card(engine.Card):
+    __slots__ = ("flip_progress", "fade_progress", "slide", "slide_from", "is_hovered", "hint")
+    
+    def __init__(self, value, row, col, index=0):
+        super().__init__(value, row, col, index)
+        self.flip_progress = 0  # 0 to 100, eased by its tween
         self.fade_progress = 0  # 0 to 100
+        self.slide = 0  # 1 at slide_from, 0 in its own cell
+        self.slide_from = (0, 0)  # Board-coordinate offset the card slides in from
+        self.is_hovered = False
+        self.hint = None  # (match odds, ((value, chance), ...)) in percent while face down, in training mode
+        
+    def get_rect(self):
+        # Calculate position with spacing, then place it in the camera's view
+        x, y, width, height = board_layout.cell_rect(self.row, self.col)
+        if self.slide:
+            x += self.slide_from[0] * self.slide
+            y += self.slide_from[1] * self.slide
+        return pygame.Rect(camera.to_screen((x, y, width, height)))
+    
+    def draw_key(self):
+        # Everything that affects how the card looks
+        return (self.value, self.state, self.flip_progress, self.fade_progress, self.slide, self.is_hovered,
+                self.hint)
         
-    def update_animation(self):
-        # Update flipping animation
-        if self.state == CARD_STATE_FLIPPING_UP:
-            self.flip_progress += FLIP_SPEED
-            if self.flip_progress >= 100:
-                self.flip_progress = 100
-                self.state = CARD_STATE_REVEALED
-        elif self.state == CARD_STATE_FLIPPING_DOWN:
-            self.flip_progress -= FLIP_SPEED
-            if self.flip_progress <= 0:
-                self.flip_progress = 0
-                self.state = CARD_STATE_HIDDEN
-        elif self.state == CARD_STATE_MATCHED_FADING:
-            self.fade_progress += MATCH_FADE_SPEED
-            if self.fade_progress >= 100:
-                self.fade_progress = 100
-                self.state = CARD_STATE_MATCHED
-                
     def draw(self, surface):
-        # Calculate position with spacing
-        x = CARD_SPACING + self.col * (CARD_SIZE + CARD_SPACING)
-        y = CARD_SPACING + self.row * (CARD_SIZE + CARD_SPACING)
+        x, y, size, _ = self.get_rect()
         
         if self.state == CARD_STATE_HIDDEN:
-            # Draw card back
-            pygame.draw.rect(surface, CARD_BACK_COLOR, (x, y, CARD_SIZE, CARD_SIZE))
-            pygame.draw.rect(surface, (0, 0, 0), (x, y, CARD_SIZE, CARD_SIZE), 3)
+            # Draw card back, with its match odds in training mode
+            surface.blit(get_card_back(size) if self.hint is None else get_hint_back(self.hint, size), (x, y))
+            if self.is_hovered:
+                pygame.draw.rect(surface, BUTTON_HOVER_COLOR, (x, y, size, size), 3)
             
         elif self.state == CARD_STATE_REVEALED:
             # Draw card front
-            pygame.draw.rect(surface, CARD_COLOR, (x, y, CARD_SIZE, CARD_SIZE))
-            text = FONT.render(str(self.value), True, (0, 0, 0))
-            text_rect = text.get_rect(center=(x + CARD_SIZE//2, y + CARD_SIZE//2))
-            surface.blit(text, text_rect)
+            surface.blit(get_card_face(self.value, 0, size), (x, y))
             
         elif self.state == CARD_STATE_FLIPPING_UP or self.state == CARD_STATE_FLIPPING_DOWN:
             # Calculate width for flip animation
             flip_ratio = abs(50 - self.flip_progress) / 50
-            width = max(1, int(CARD_SIZE * flip_ratio))
+            width = max(1, int(size * flip_ratio))
             
             # Draw card with animation
-            card_x = x + (CARD_SIZE - width) // 2
+            card_x = x + (size - width) // 2
             
             if self.flip_progress < 50:  # First half of flip (showing back)
-                pygame.draw.rect(surface, CARD_BACK_COLOR, (card_x, y, width, CARD_SIZE))
-            else:  # Second half of flip (showing front)
-                pygame.draw.rect(surface, CARD_COLOR, (card_x, y, width, CARD_SIZE))
-                if width > CARD_SIZE // 2:  # Only show text when card is wide enough
-                    text = FONT.render(str(self.value), True, (0, 0, 0))
-                    text_rect = text.get_rect(center=(x + CARD_SIZE//2, y + CARD_SIZE//2))
-                    surface.blit(text, text_rect)
+                pygame.draw.rect(surface, CARD_BACK_COLOR, (card_x, y, width, size))
+            elif width > size // 2:  # Only show text when card is wide enough
+                # Second half of flip: the middle strip of the cached front
+                surface.blit(get_card_face(self.value, 0, size), (card_x, y), ((size - width) // 2, 0, width, size))
+            else:
+                pygame.draw.rect(surface, CARD_COLOR, (card_x, y, width, size))
             
             # Draw border
-            pygame.draw.rect(surface, (0, 0, 0), (card_x, y, width, CARD_SIZE), 3)
+            pygame.draw.rect(surface, (0, 0, 0), (card_x, y, width, size), 3)
             
         elif self.state == CARD_STATE_MATCHED_FADING:
-            # Draw fading card
-            alpha = int(255 * (100 - self.fade_progress) / 100)
-            card_surface = pygame.Surface((CARD_SIZE, CARD_SIZE), pygame.SRCALPHA)
-            card_surface.fill((CARD_COLOR[0], CARD_COLOR[1], CARD_COLOR[2], alpha))
-            surface.blit(card_surface, (x, y))
-            
-            # Draw fading text
-            text = FONT.render(str(self.value), True, (0, 0, 0, alpha))
-            text_rect = text.get_rect(center=(x + CARD_SIZE//2, y + CARD_SIZE//2))
-            surface.blit(text, text_rect)
+            # Draw fading card and text from the pre-baked fade step
+            fade_step = round(self.fade_progress * FADE_STEPS / 100)
+            if fade_step < FADE_STEPS:
+                surface.blit(get_card_face(self.value, fade_step, size), (x, y))
         
         # Matched cards are invisible - no drawing needed
             
-    def is_animating(self):
-        return self.state in [CARD_STATE_FLIPPING_UP, CARD_STATE_FLIPPING_DOWN, CARD_STATE_MATCHED_FADING]
-    
-    def is_revealed(self):
-        return self.state in [CARD_STATE_REVEALED, CARD_STATE_FLIPPING_UP, CARD_STATE_FLIPPING_DOWN]
-    
-    def is_matched(self):
-        return self.state in [CARD_STATE_MATCHED, CARD_STATE_MATCHED_FADING]
-    
-    def flip_up(self):
+    def flip_up(self, delay=0):
         if self.state == CARD_STATE_HIDDEN:
             self.state = CARD_STATE_FLIPPING_UP
-            self.flip_progress = 0
+            tweener.start(self, "flip_progress", 100, FLIP_DURATION, ease_in_out, delay, start=0,
+                          on_done=lambda: self.finish(CARD_STATE_FLIPPING_UP, CARD_STATE_REVEALED))
             
-    def flip_down(self):
+    def flip_down(self, delay=0):
         if self.state == CARD_STATE_REVEALED:
             self.state = CARD_STATE_FLIPPING_DOWN
-            self.flip_progress = 100
+            tweener.start(self, "flip_progress", 0, FLIP_DURATION, ease_in_out, delay, start=100,
+                          on_done=lambda: self.finish(CARD_STATE_FLIPPING_DOWN, CARD_STATE_HIDDEN))
             
     def set_matched(self):
         if self.state == CARD_STATE_REVEALED:
             self.state = CARD_STATE_MATCHED_FADING
-            self.fade_progress = 0
+            tweener.start(self, "fade_progress", 100, MATCH_FADE_DURATION, ease_out, start=0,
+                          on_done=lambda: self.finish(CARD_STATE_MATCHED_FADING, CARD_STATE_MATCHED))
+    
+    def finish(self, animating_state, final_state):
+        # A tween ended; the card settles unless something else moved it on meanwhile
+        if self.state == animating_state:
+            self.state = final_state
 
 # Set up the game state
-def setup_game():
-    # Generate Cards (Triplets of Numbers)
-    # For a 6x6 grid with 3 matching cards, we need 12 unique values, each repeated 3 times
-    card_values = list(range(1, (GRID_SIZE**2 // 3) + 1)) * 3
-    random.shuffle(card_values)
-    
-    # Create Cards
-    cards = []
-    for i in range(GRID_SIZE):
-        for j in range(GRID_SIZE):
-            index = i * GRID_SIZE + j
-            cards.append(Card(card_values[index], i, j))
+def setup_game(game_mode, seed=None, grid_size=GRID_SIZE, difficulty=AI_DIFFICULTY, saved=None):
+    """Create a new engine game with animated cards and, vs AI, its memory; or carry on a saved one."""
+    global hint_overlay
+    if seed is None:
+        seed = recording.new_seed()  # A known seed lets the game be recorded and replayed
+    if saved is not None:
+        game = saved.new_game(random.Random(seed), card_factory=Card)
+    else:
+        game = engine.Game(grid_size, random.Random(seed), card_factory=Card)
+    configure_board(game.rows, game.cols)
+    tweener.clear()  # Nothing left over from the last game's cards
     
     # For the AI
-    ai_memory = {}  # Will store {card_value: [card_obj, ...]}
+    ai = None
+    if game_mode == MODE_VS_AI:
+        if difficulty == "expert":
+            ai = solver.SolverAI(game.rng)  # Never forgets, plays the precomputed optimal policy
+        elif difficulty == "montecarlo":
+            ai = montecarlo.MonteCarloAI(game.rng)  # Samples the unseen cards on a worker pool
+        elif difficulty == "hints":
+            ai = hints.HintEngine(game.rng)  # Plays the card with the best posterior match odds
+        else:
+            ai = engine.MemoryAI(game.rng, **engine.AI_DIFFICULTIES[difficulty])
+        game.observers.append(ai)
+    
+    hint_overlay = None
+    if show_hints:
+        hint_engine = hints.HintEngine()
+        game.observers.append(hint_engine)
+        hint_overlay = HintOverlay(hint_engine)
     
-    # Scores
-    player1_score = 0
-    player2_score = 0
+    # A recording replays from the shuffle, so resumed and practice games can't be recorded
+    if recording_writer is not None and saved is None and not practice_mode:
+        game.observers.append(recording.GameRecorder(recording_writer, seed, game.rows, game.cols))
     
-    return cards, ai_memory, player1_score, player2_score
+    if saved is not None:
+        game.restore(saved.state)  # After the AI is in, so its memory comes back too
+    return game, ai
 
-def draw_start_menu():
+def draw_start_menu(stats_lines=()):
     """Draw the start menu with game mode options"""
-    screen.fill(BG_COLOR)
+    app.screen.fill(BG_COLOR)
     
     # Title
-    title_text = TITLE_FONT.render("Memory Match Game", True, TEXT_COLOR)
+    title_text = render_text(TITLE_FONT, "Memory Match Game", TEXT_COLOR)
     title_rect = title_text.get_rect(center=(WIDTH//2, HEIGHT//4))
-    screen.blit(title_text, title_rect)
+    app.screen.blit(title_text, title_rect)
     
     # Create buttons
     vs_ai_button = Button(WIDTH//2 - 150, HEIGHT//2 - 50, 300, 80, "Play vs AI")
     vs_player_button = Button(WIDTH//2 - 150, HEIGHT//2 + 50, 300, 80, "Play vs Friend")
+    theme_button = Button(WIDTH//2 - 150, HEIGHT//2 + 150, 300, 80, f"Theme: {theme_loader.theme}")
     
     # Draw buttons
-    vs_ai_button.draw(screen)
-    vs_player_button.draw(screen)
+    vs_ai_button.draw(app.screen)
+    vs_player_button.draw(app.screen)
+    theme_button.draw(app.screen)
     
-    pygame.display.flip()
+    # Theme images still loading
+    loaded, total = theme_loader.progress()
+    if loaded < total:
+        progress_text = render_text(SMALL_FONT, f"Loading images {loaded}/{total}", TEXT_COLOR)
+        app.screen.blit(progress_text, progress_text.get_rect(center=(WIDTH//2, HEIGHT//2 + 255)))
     
-    return vs_ai_button, vs_player_button
-
-def draw_board(cards, player1_score, player2_score, current_player, game_mode):
-    """Draws the current state of the game board with scores."""
-    # Clear the screen
-    screen.fill(BG_COLOR)
+    # Past results
+    for line_number, line in enumerate(stats_lines):
+        line_text = render_text(SMALL_FONT, line, TEXT_COLOR)
+        app.screen.blit(line_text, line_text.get_rect(center=(WIDTH//2, HEIGHT//2 + 295 + 40 * line_number)))
     
-    # Draw all cards
-    for card in cards:
-        card.draw(screen)
+    pygame.display.flip()
     
-    # Draw score panel
-    pygame.draw.rect(screen, (50, 50, 50), (0, HEIGHT, WIDTH, SCORE_PANEL_HEIGHT))
+    return vs_ai_button, vs_player_button, theme_button
+
+def draw_score_panel(surface, player1_score, player2_score, current_player, game_mode):
+    """Draws the score panel below the board."""
+    pygame.draw.rect(surface, (50, 50, 50), (0, HEIGHT, WIDTH, SCORE_PANEL_HEIGHT))
     
     # Draw scores based on game mode
     if game_mode == MODE_VS_AI:
-        player_text = SMALL_FONT.render(f"Player: {player1_score}", True, TEXT_COLOR)
-        ai_text = SMALL_FONT.render(f"AI: {player2_score}", True, TEXT_COLOR)
-        screen.blit(player_text, (20, HEIGHT + 15))
-        screen.blit(ai_text, (WIDTH - 20 - ai_text.get_width(), HEIGHT + 15))
+        player_text = render_text(SMALL_FONT, f"Player: {player1_score}", TEXT_COLOR)
+        ai_text = render_text(SMALL_FONT, f"AI: {player2_score}", TEXT_COLOR)
+        surface.blit(player_text, (20, HEIGHT + 15))
+        surface.blit(ai_text, (WIDTH - 20 - ai_text.get_width(), HEIGHT + 15))
         
         # Draw turn indicator
-        turn_text = SMALL_FONT.render("Player's Turn" if current_player == 1 else "AI's Turn", True, TEXT_COLOR)
+        turn_text = render_text(SMALL_FONT, "Player's Turn" if current_player == 1 else "AI's Turn", TEXT_COLOR)
     else:  # VS_PLAYER mode
-        player1_text = SMALL_FONT.render(f"Player 1: {player1_score}", True, TEXT_COLOR)
-        player2_text = SMALL_FONT.render(f"Player 2: {player2_score}", True, TEXT_COLOR)
-        screen.blit(player1_text, (20, HEIGHT + 15))
-        screen.blit(player2_text, (WIDTH - 20 - player2_text.get_width(), HEIGHT + 15))
+        player1_text = render_text(SMALL_FONT, f"Player 1: {player1_score}", TEXT_COLOR)
+        player2_text = render_text(SMALL_FONT, f"Player 2: {player2_score}", TEXT_COLOR)
+        surface.blit(player1_text, (20, HEIGHT + 15))
+        surface.blit(player2_text, (WIDTH - 20 - player2_text.get_width(), HEIGHT + 15))
         
         # Draw turn indicator
-        turn_text = SMALL_FONT.render(f"Player {current_player}'s Turn", True, TEXT_COLOR)
+        turn_text = render_text(SMALL_FONT, f"Player {current_player}'s Turn", TEXT_COLOR)
     
     turn_rect = turn_text.get_rect(center=(WIDTH//2, HEIGHT + 25))
-    screen.blit(turn_text, turn_rect)
-    
-    pygame.display.flip()
+    surface.blit(turn_text, turn_rect)
+
+class BoardRenderer:
+    """Retained-mode board drawing that only repaints what changed."""
+    def __init__(self, surface, present=True):
+        self.surface = surface
+        self.present = present  # Update the display; off for offscreen surfaces
+        self.cards = None  # Board drawn last frame
+        self.card_keys = {}  # {card_index: what that card looked like when drawn}
+        self.panel_key = None
+        self.camera_version = None
+        self.full_redraw = True
+        self.sliding = False  # Cards were moving between cells last frame
+        
+    def invalidate(self):
+        """Force a full repaint, e.g. after another screen drew over the board."""
+        self.full_redraw = True
+        
+    def render(self, cards, player1_score, player2_score, current_player, game_mode):
+        if cards is not self.cards or camera.version != self.camera_version:
+            self.cards = cards
+            self.camera_version = camera.version
+            self.full_redraw = True
+            # Zoomed out on a big board, more distinct faces are in view than the base cache holds
+            surface_cache.reserve(len(get_visible_cards(cards)) * SURFACES_PER_CARD)
+        
+        # Sliding cards leave their old spot behind, so repaint until they have landed
+        sliding = tweener.animating("slide")
+        if sliding or self.sliding:
+            self.full_redraw = True
+        self.sliding = sliding
+        
+        full_redraw = self.full_redraw
+        if full_redraw:
+            self.surface.fill(BG_COLOR)
+            self.card_keys = {}
+            self.panel_key = None
+        
+        dirty_rects = []
+        profiling = profiler.enabled
+        draw_times = {}  # {card state: seconds spent in Card.draw}, only while profiling
+        
+        # Redraw visible cards whose state or animation progress moved
+        self.surface.set_clip(board_view)
+        for card in get_visible_cards(cards):
+            key = card.draw_key()
+            if self.card_keys.get(card.index) != key:
+                self.card_keys[card.index] = key
+                rect = card.get_rect()
+                self.surface.fill(BG_COLOR, rect)
+                start = time.perf_counter() if profiling else 0
+                card.draw(self.surface)
+                if profiling:
+                    draw_times[card.state] = draw_times.get(card.state, 0) + time.perf_counter() - start
+                dirty_rects.append(rect.clip(board_view))
+        self.surface.set_clip(None)
+        if draw_times:
+            profiler.counter("card draw ms", {CARD_STATE_NAMES[state]: seconds * 1000
+                                              for state, seconds in draw_times.items()})
+        
+        # Redraw score panel only when scores, the turn or the overlay change
+        overlay_text = profiler.overlay_text() if profiler.overlay else None
+        panel_key = (player1_score, player2_score, current_player, game_mode, overlay_text)
+        if panel_key != self.panel_key:
+            self.panel_key = panel_key
+            draw_score_panel(self.surface, player1_score, player2_score, current_player, game_mode)
+            if overlay_text:
+                text = render_text(OVERLAY_FONT, overlay_text, TEXT_COLOR)
+                self.surface.blit(text, text.get_rect(midbottom=(WIDTH//2, WINDOW_HEIGHT - 1)))
+            dirty_rects.append(pygame.Rect(0, HEIGHT, WIDTH, SCORE_PANEL_HEIGHT))
+        
+        if self.present:
+            with profiler.span("display update"):
+                if full_redraw:
+                    pygame.display.flip()
+                elif dirty_rects:
+                    pygame.display.update(dirty_rects)
+        self.full_redraw = False
+        return dirty_rects
+
+board_view = pygame.Rect(0, 0, WIDTH, HEIGHT)  # Screen area the board is drawn in
+def get_visible_cards(cards):
+    """Cards inside the camera's view, found without looking at the rest."""
+    card_count = len(cards)
+    return [cards[index] for index in board_layout.indices_in_rect(camera.visible_rect())
+            if index < card_count]
+
+def draw_board(cards, player1_score, player2_score, current_player, game_mode):
+    """Draws the current state of the game board with scores."""
+    app.board_renderer.render(cards, player1_score, player2_score, current_player, game_mode)
 
 def get_card_at_position(cards, position):
     """Get card at the given position."""
-    x, y = position
-    
-    for card in cards:
-        # Calculate card position with spacing
-        card_x = CARD_SPACING + card.col * (CARD_SIZE + CARD_SPACING)
-        card_y = CARD_SPACING + card.row * (CARD_SIZE + CARD_SPACING)
-        
-        # Check if position is within card bounds
-        if (card_x <= x <= card_x + CARD_SIZE and 
-            card_y <= y <= card_y + CARD_SIZE):
-            return card
-            
-    return None
+    # Work out the cell arithmetically in world coordinates instead of scanning
+    index = board_layout.index_at(*camera.to_world(*position))
+    if index is None or index >= len(cards):
+        return None
+    return cards[index]
 
-def get_revealed_cards(cards):
+def update_card_hover(cards, position, hovered_card):
+    """Highlight the face-down card under the mouse and return it."""
+    card = get_card_at_position(cards, position) if position else None
+    if card is not None and not card.is_available():
+        card = None
+    if card is not hovered_card:
+        if hovered_card is not None:
+            hovered_card.is_hovered = False
+        if card is not None:
+            card.is_hovered = True
+    return card
+
+class HintOverlay:
+    """Likeliest values and match odds on the face-down cards in view, worked out again only after a flip or a scroll.
+
+    Cards already seen are left plain: naming their value would do the remembering for the player.
+    """
+    def __init__(self, hint_engine):
+        self.hint_engine = hint_engine
+        self.key = None
+        self.cards = []  # Cards showing a hint
+
+    def update(self, game, show):
+        key = (self.hint_engine.version, len(game.flipped), len(game.board.hidden), camera.version, show)
+        if key == self.key:
+            return
+        self.key = key
+        for card in self.cards:
+            card.hint = None
+        self.cards = []
+        if not show:
+            return
+        with profiler.span("hints"):
+            probabilities = self.hint_engine.match_probabilities(game.board, game.flipped)
+            for card in get_visible_cards(game.cards):
+                if card.is_available() and self.hint_engine.known[card.index] == hints.UNSEEN:
+                    likely = tuple((value, round(chance * 100))
+                                   for value, chance in self.hint_engine.likely_values(card.index, HINT_VALUES))
+                    card.hint = (round(probabilities[card.index] * 100), likely)
+                    self.cards.append(card)
+
+def get_revealed_cards(board):
     """Get list of currently revealed cards."""
-    return [card for card in cards if card.is_revealed() and not card.is_matched()]
-
-def animate_cards(cards):
-    """Update card animations and return True if any card is animating."""
-    animating = False
-    for card in cards:
-        if card.is_animating():
-            card.update_animation()
-            animating = True
+    return list(board.revealed)
+
+def animate_cards(dt):
+    """Advance card animations by dt milliseconds and return True if any card is animating."""
+    # Only tweens in flight are visited; finished ones drop out of the list
+    animating = bool(tweener)
+    tweener.update(dt)
     return animating
 
-def wait_for_animations(cards, player1_score, player2_score, current_player, game_mode):
-    """Wait until all card animations are complete."""
-    while animate_cards(cards):
-        draw_board(cards, player1_score, player2_score, current_player, game_mode)
-        pygame.time.delay(ANIMATION_DELAY)
-        
-        # Keep processing events to allow quitting
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
+def deal_cards(cards):
+    """Slide the cards in view out from the middle of the window, one after another."""
+    visible = get_visible_cards(cards)
+    center_x, center_y = camera.to_world(WIDTH // 2, HEIGHT // 2)
+    stagger = DEAL_SPREAD / max(1, len(visible) - 1)
+    for order, card in enumerate(visible):
+        x, y, width, height = board_layout.cell_rect(card.row, card.col)
+        card.slide_from = (center_x - width / 2 - x, center_y - height / 2 - y)
+        tweener.start(card, "slide", 0, DEAL_DURATION, ease_out_back, order * stagger, start=1)
 
-def player_turn_handler(cards, ai_memory, game_mode):
-    """Handle player's turn with fancy animations."""
-    revealed_cards = get_revealed_cards(cards)
-    
-    # Wait for player to select cards
-    while len(revealed_cards) < 3:
-        # Handle events
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
-            
-            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                # Only check board area, not score panel
-                if event.pos[1] < HEIGHT:
-                    clicked_card = get_card_at_position(cards, event.pos)
-                    if clicked_card and not clicked_card.is_revealed() and not clicked_card.is_matched():
-                        clicked_card.flip_up()
-                        
-                        # Remember card for AI (if in AI mode)
-                        if game_mode == MODE_VS_AI:
-                            if clicked_card.value not in ai_memory:
-                                ai_memory[clicked_card.value] = []
-                            if clicked_card not in ai_memory[clicked_card.value]:
-                                ai_memory[clicked_card.value].append(clicked_card)
-        
-        # Update animations
-        animate_cards(cards)
-        draw_board(cards, player1_score, player2_score, current_player, game_mode)
-        pygame.time.delay(ANIMATION_DELAY)
-        
-        # Update revealed cards
-        revealed_cards = get_revealed_cards(cards)
-        
-        # If we have 3 revealed cards and they're done animating, we're done
-        if len(revealed_cards) >= 3:
-            wait_for_animations(cards, player1_score, player2_score, current_player, game_mode)
-            break
-    
-    # Check for match
-    if len(revealed_cards) >= 3:
-        card1, card2, card3 = revealed_cards[0], revealed_cards[1], revealed_cards[2]
-        
-        if card1.value == card2.value == card3.value:
-            # We have a match
-            card1.set_matched()
-            card2.set_matched()
-            card3.set_matched()
-            wait_for_animations(cards, player1_score, player2_score, current_player, game_mode)
-            
-            # Remove from AI memory if in AI mode
-            if game_mode == MODE_VS_AI and card1.value in ai_memory:
-                ai_memory.pop(card1.value)
-                
-            return True, 1  # Player gets another turn and 1 point
-        else:
-            # No match, hide cards after delay
-            pygame.time.delay(1000)  # Wait a second before flipping back
-            for card in revealed_cards:
-                card.flip_down()
-            wait_for_animations(cards, player1_score, player2_score, current_player, game_mode)
-            return False, 0  # Switch turns, no points
-    
-    return True, 0  # Just in case
-
-def ai_turn_handler(cards, ai_memory):
-    """Handle AI's turn with fancy animations."""
-    # First look for matches in memory
-    potential_match = None
-    for value, card_list in ai_memory.items():
-        valid_cards = [card for card in card_list if not card.is_matched()]
-        if len(valid_cards) >= 3:
-            potential_match = (valid_cards[0], valid_cards[1], valid_cards[2])
-            break
-    
-    # Flip cards based on AI knowledge or random selection
-    flipped_cards = []
-    
-    if potential_match:
-        # AI knows a match
-        card1, card2, card3 = potential_match
-        card1.flip_up()
-        flipped_cards.append(card1)
-        wait_for_animations(cards, player1_score, player2_score, current_player, MODE_VS_AI)
-        
-        pygame.time.delay(500)  # Add delay between flips
-        
-        card2.flip_up()
-        flipped_cards.append(card2)
-        wait_for_animations(cards, player1_score, player2_score, current_player, MODE_VS_AI)
-        
-        pygame.time.delay(500)  # Add delay between flips
-        
-        card3.flip_up()
-        flipped_cards.append(card3)
-        wait_for_animations(cards, player1_score, player2_score, current_player, MODE_VS_AI)
+def peek_cards(cards, scheduler, hold=PEEK_TIME):
+    """Turn every face-down card in view up in a wave from the top left, then back down."""
+    visible = [card for card in get_visible_cards(cards) if card.is_available()]
+    if not visible or hold <= 0:
+        return
+    first = min(card.row + card.col for card in visible)
+    stagger = PEEK_SPREAD / max(1, max(card.row + card.col for card in visible) - first)
+    for card in visible:
+        card.flip_up((card.row + card.col - first) * stagger)
+    # Each card gets the same time face up, the wave going back down in the same order
+    scheduler.after(PEEK_SPREAD + FLIP_DURATION + hold, lambda: [
+        card.flip_down((card.row + card.col - first) * stagger) for card in visible])
+
+def player_turn_handler(game, position):
+    """Flip the card the human player clicked, if it can be flipped; True if it was."""
+    # Only check board area, not score panel
+    if position[1] < HEIGHT:
+        clicked_card = get_card_at_position(game.cards, position)
+        if clicked_card:
+            # The engine also shows the card to the AI (if in AI mode)
+            return game.flip(clicked_card)
+    return False
+
+def ai_turn_handler(game, ai, scheduler):
+    """Schedule the AI's next flip, picked from its memory or at random."""
+    delay = AI_FLIP_DELAY if game.flipped else 0  # Add delay between flips
+    if hasattr(ai, "request_card"):
+        # Background thinking starts now and overlaps the delay; frames keep drawing meanwhile
+        with profiler.span("ai request"):
+            choice = ai.request_card(game.board, game.flipped)
+        scheduler.after(delay, lambda: flip_when_ready(game, choice, scheduler))
     else:
-        # Need to flip cards randomly
-        
-        # First card: random selection
-        available_cards = [card for card in cards if not card.is_revealed() and not card.is_matched()]
-        
-        if not available_cards:
-            return True, 0  # No cards left to flip
-        
-        # Flip first card
-        card1 = random.choice(available_cards)
-        card1.flip_up()
-        flipped_cards.append(card1)
-        
-        # Remember this card
-        if card1.value not in ai_memory:
-            ai_memory[card1.value] = []
-        if card1 not in ai_memory[card1.value]:
-            ai_memory[card1.value].append(card1)
-            
-        wait_for_animations(cards, player1_score, player2_score, current_player, MODE_VS_AI)
-        pygame.time.delay(500)  # Add delay between flips
-        
-        # Second card: check memory for potential match
-        found_match = False
-        second_card = None
-        
-        if card1.value in ai_memory:
-            for card2 in ai_memory[card1.value]:
-                if card2 != card1 and not card2.is_revealed() and not card2.is_matched():
-                    card2.flip_up()
-                    flipped_cards.append(card2)
-                    second_card = card2
-                    found_match = True
-                    break
-        
-        # If no match in memory, pick randomly
-        if not found_match:
-            available_cards = [card for card in cards if not card.is_revealed() and not card.is_matched() and card != card1]
-            
-            if available_cards:
-                card2 = random.choice(available_cards)
-                card2.flip_up()
-                flipped_cards.append(card2)
-                second_card = card2
-                
-                # Remember this card
-                if card2.value not in ai_memory:
-                    ai_memory[card2.value] = []
-                if card2 not in ai_memory[card2.value]:
-                    ai_memory[card2.value].append(card2)
-                    
-        wait_for_animations(cards, player1_score, player2_score, current_player, MODE_VS_AI)
-        pygame.time.delay(500)  # Add delay between flips
-        
-        # Third card: check memory for potential match
-        found_match = False
-        
-        if second_card and card1.value == second_card.value and card1.value in ai_memory:
-            for card3 in ai_memory[card1.value]:
-                if card3 != card1 and card3 != second_card and not card3.is_revealed() and not card3.is_matched():
-                    card3.flip_up()
-                    flipped_cards.append(card3)
-                    found_match = True
-                    break
-        
-        # If no match in memory, pick randomly
-        if not found_match:
-            available_cards = [card for card in cards if not card.is_revealed() and not card.is_matched() and card not in flipped_cards]
-            
-            if available_cards:
-                card3 = random.choice(available_cards)
-                card3.flip_up()
-                flipped_cards.append(card3)
-                
-                # Remember this card
-                if card3.value not in ai_memory:
-                    ai_memory[card3.value] = []
-                if card3 not in ai_memory[card3.value]:
-                    ai_memory[card3.value].append(card3)
-        
-        wait_for_animations(cards, player1_score, player2_score, current_player, MODE_VS_AI)
-    
-    # Check for match if we flipped three cards
-    if len(flipped_cards) == 3:
-        card1, card2, card3 = flipped_cards
-        
-        if card1.value == card2.value == card3.value:
-            # We have a match
-            pygame.time.delay(500)  # Short delay before marking as matched
-            card1.set_matched()
-            card2.set_matched()
-            card3.set_matched()
-            wait_for_animations(cards, player1_score, player2_score, current_player, MODE_VS_AI)
-            
-            # Remove from memory
-            if card1.value in ai_memory:
-                ai_memory.pop(card1.value)
-                
-            return True, 1  # AI gets another turn and 1 point
-        else:
-            # No match
-            pygame.time.delay(1000)  # Wait a second before flipping back
-            for card in flipped_cards:
-                card.flip_down()
-            wait_for_animations(cards, player1_score, player2_score, current_player, MODE_VS_AI)
-            return False, 0  # Switch to player turn, no points
-    
-    return False, 0  # Just in case
+        scheduler.after(delay, lambda: ai_flip(game, ai))
+
+def ai_flip(game, ai):
+    with profiler.span("ai decision"):
+        card = ai.choose_card(game.board, game.flipped)
+    game.flip(card)
 
-def show_game_over(player1_score, player2_score, game_mode):
-    """Display game over screen with final scores and replay option."""
-    overlay = pygame.Surface((WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, 180))  # Semi-transparent overlay
-    screen.blit(overlay, (0, 0))
+def flip_when_ready(game, choice, scheduler):
+    """Flip the AI's card once it has decided, checking again every frame until then."""
+    if choice.done():
+        with profiler.span("ai decision"):
+            card = choice.result()
+        game.flip(card)
+    else:
+        scheduler.after(AI_POLL_INTERVAL, lambda: flip_when_ready(game, choice, scheduler))
+
+def resolve_turn_handler(game, game_mode, scheduler):
+    """Schedule scoring of the three flipped cards once everyone has seen them."""
+    ai_turn = game_mode == MODE_VS_AI and game.current_player == 2
+    if game.is_match():
+        delay = AI_FLIP_DELAY if ai_turn else 0  # Short delay before marking as matched
+    else:
+        delay = FLIP_BACK_DELAY  # Wait a second before flipping back
+    scheduler.after(delay, game.resolve_turn)
+
+def update_button_hover(buttons, position):
+    """Redraw buttons whose hover highlight changed."""
+    for button in buttons:
+        was_hovered = button.is_hovered
+        if button.check_hover(position) != was_hovered:
+            button.draw(app.screen)
+            pygame.display.update(button.rect)
+
+def draw_game_over(player1_score, player2_score, game_mode, stats_line=None):
+    """Draw the game over screen with final scores and return the replay button."""
+    def build_overlay():
+        overlay = pygame.Surface((WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 180))  # Semi-transparent overlay
+        return overlay
+    app.screen.blit(surface_cache.get(("overlay", WIDTH, WINDOW_HEIGHT), build_overlay), (0, 0))
     
     # Game over text
-    game_over_font = pygame.font.Font(None, 72)
-    game_over_text = game_over_font.render("Game Over!", True, (255, 255, 255))
+    game_over_text = render_text(TITLE_FONT, "Game Over!", (255, 255, 255))
     game_over_rect = game_over_text.get_rect(center=(WIDTH//2, HEIGHT//4))
-    screen.blit(game_over_text, game_over_rect)
+    app.screen.blit(game_over_text, game_over_rect)
     
     # Final scores
-    score_font = pygame.font.Font(None, 48)
-    
     if game_mode == MODE_VS_AI:
-        player_text = score_font.render(f"Player: {player1_score}", True, (255, 255, 255))
-        opponent_text = score_font.render(f"AI: {player2_score}", True, (255, 255, 255))
+        player_text = render_text(MENU_FONT, f"Player: {player1_score}", (255, 255, 255))
+        opponent_text = render_text(MENU_FONT, f"AI: {player2_score}", (255, 255, 255))
     else:  # VS_PLAYER mode
-        player_text = score_font.render(f"Player 1: {player1_score}", True, (255, 255, 255))
-        opponent_text = score_font.render(f"Player 2: {player2_score}", True, (255, 255, 255))
+        player_text = render_text(MENU_FONT, f"Player 1: {player1_score}", (255, 255, 255))
+        opponent_text = render_text(MENU_FONT, f"Player 2: {player2_score}", (255, 255, 255))
     
     player_rect = player_text.get_rect(center=(WIDTH//2, HEIGHT//2))
-    screen.blit(player_text, player_rect)
+    app.screen.blit(player_text, player_rect)
     
     opponent_rect = opponent_text.get_rect(center=(WIDTH//2, HEIGHT//2 + 60))
-    screen.blit(opponent_text, opponent_rect)
+    app.screen.blit(opponent_text, opponent_rect)
     
     # Winner
-    winner_font = pygame.font.Font(None, 54)
     if player1_score > player2_score:
         if game_mode == MODE_VS_AI:
-            winner_text = winner_font.render("You Win!", True, (0, 255, 0))
+            winner_text = render_text(WINNER_FONT, "You Win!", (0, 255, 0))
         else:
-            winner_text = winner_font.render("Player 1 Wins!", True, (0, 255, 0))
+            winner_text = render_text(WINNER_FONT, "Player 1 Wins!", (0, 255, 0))
     elif player2_score > player1_score:
         if game_mode == MODE_VS_AI:
-            winner_text = winner_font.render("AI Wins!", True, (255, 0, 0))
+            winner_text = render_text(WINNER_FONT, "AI Wins!", (255, 0, 0))
         else:
-            winner_text = winner_font.render("Player 2 Wins!", True, (255, 0, 0))
+            winner_text = render_text(WINNER_FONT, "Player 2 Wins!", (255, 0, 0))
     else:
-        winner_text = winner_font.render("It's a Tie!", True, (255, 255, 0))
+        winner_text = render_text(WINNER_FONT, "It's a Tie!", (255, 255, 0))
     
     winner_rect = winner_text.get_rect(center=(WIDTH//2, HEIGHT//2 + 120))
-    screen.blit(winner_text, winner_rect)
+    app.screen.blit(winner_text, winner_rect)
     
     # Play again button
     play_again_button = Button(WIDTH//2 - 150, HEIGHT//2 + 200, 300, 80, "Play Again")
-    play_again_button.draw(screen)
+    play_again_button.draw(app.screen)
     
-    pygame.display.flip()
+    # Totals including this game
+    if stats_line:
+        stats_text = render_text(SMALL_FONT, stats_line, TEXT_COLOR)
+        app.screen.blit(stats_text, stats_text.get_rect(center=(WIDTH//2, HEIGHT//2 + 320)))
     
-    # Wait for user response
-    waiting = True
-    while waiting:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return False  # Exit game
-            
-            if event.type == pygame.MOUSEMOTION:
-                play_again_button.check_hover(event.pos)
-                pygame.display.update()
-                
-            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                if play_again_button.is_clicked(event.pos):
-                    return True  # Start new game
-                
-            if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
-                return False  # Exit game
+    pygame.display.flip()
     
-    return False  # Default to exit
+    return play_again_button
+
+def record_result(mode, player1, player2, game, score1, score2, turns):
+    """Queue a finished game in the stats store, if there is one."""
+    if stats_store is not None:
+        stats_store.record(stats.game_result(mode, player1, player2, game.rows, game.cols, score1, score2, turns))
 
-def main():
-    global player1_score, player2_score, current_player
+def stats_line(mode, difficulty=None):
+    """One line of totals for a mode from the store's in-memory copy, or None."""
+    if stats_store is None:
+        return None
+    totals = stats_store.summary(mode, player2=difficulty if mode == stats.MODE_AI else None)
+    if not totals.games:
+        return None
+    if mode == stats.MODE_AI:
+        return (f"vs AI ({difficulty}): {totals.games} games, {totals.win_rate():.0%} won, "
+                f"best {totals.best1}, {totals.average_turns():.1f} turns")
+    if mode == stats.MODE_ONLINE:
+        return (f"Online: {totals.games} games, {totals.win_rate():.0%} won, "
+                f"best {totals.best1}, {totals.average_turns():.1f} turns")
+    return f"vs Friend: {totals.games} games, best {max(totals.best1, totals.best2)}, {totals.average_turns():.1f} turns"
+
+def menu_stats_lines(difficulty):
+    if stats_store is None:
+        return []
+    stats_store.refresh()  # Picks up games saved by other processes, e.g. tournament.py --stats
+    lines = [stats_line(stats.MODE_AI, difficulty), stats_line(stats.MODE_FRIEND)]
+    return [line for line in lines if line]
+
+class FramePacer:
+    """Frame rate policy: FRAME_RATE while anything moves, a slow tick while idle.
+    
+    pygame.event.wait(timeout) looks like the way to sleep until input, but
+    pygame implements it by polling every millisecond, which wakes the process
+    about 1000 times a second. An idle screen instead ticks at IDLE_FRAME_RATE,
+    dropping to DEEP_IDLE_FRAME_RATE when nothing has happened for a while.
+    """
+    def __init__(self):
+        self.clock = pygame.time.Clock()
+        self.last_activity = time.perf_counter()  # Last frame with events or something moving
     
+    def next_frame(self, idle):
+        """Wait for the next frame and return (ms of animation time since the last one, events)."""
+        if not idle:
+            rate = FRAME_RATE
+        elif time.perf_counter() - self.last_activity < DEEP_IDLE_AFTER:
+            rate = IDLE_FRAME_RATE
+        else:
+            rate = DEEP_IDLE_FRAME_RATE
+        dt = self.clock.tick(rate)
+        profiler.begin_frame(idle)
+        with profiler.span("events"):
+            events = pygame.event.get()
+        if events or not idle:
+            self.last_activity = time.perf_counter()
+        # Nothing was moving during an idle wait, so none of it counts as animation time;
+        # a click that starts a flip this frame shouldn't find it part done
+        return (0 if idle else dt), events
+
+def board_idle(game, game_mode, scheduler):
+    """True when nothing on the board changes until the player acts."""
+    if tweener or scheduler.pending() or game.turn_complete() or game.is_over():
+        return False
+    if game_mode == MODE_VS_AI and game.current_player == 2:
+        return False  # The AI is about to move
+    keys = pygame.key.get_pressed()
+    return not any(keys[key] for key in SCROLL_KEYS)  # Held keys scroll without sending events
+
+def main(grid_size=GRID_SIZE, difficulty=AI_DIFFICULTY, startup_only=False, peek_time=PEEK_TIME, resume=None):
+    app.start()
+    pacer = FramePacer()
+    scheduler = Scheduler()
+    history = engine.History()  # Turn starts to undo back to in practice mode
     game_state = STATE_MENU
     game_mode = MODE_VS_AI  # Default to AI mode
     
+    # Show start menu
+    menu_lines = menu_stats_lines(difficulty)
+    buttons = draw_start_menu(menu_lines)
+    app.menu_shown()
+    if startup_only:
+        app.quit()
+        return
+    
+    # A saved game goes straight back to the board
+    if resume is not None:
+        game_mode = resume.mode
+        difficulty = resume.difficulty or difficulty
+        game, ai = setup_game(game_mode, difficulty=difficulty, saved=resume)
+        hovered_card = None
+        game_state = STATE_PLAYING
+    
+    # One frame per iteration; nothing in here blocks
     while True:
-        if game_state == STATE_MENU:
-            # Show start menu
-            vs_ai_button, vs_player_button = draw_start_menu()
+        idle = not theme_loader.loading() and (game_state != STATE_PLAYING or board_idle(game, game_mode, scheduler))
+        dt, events = pacer.next_frame(idle)
+        for event in events:
+            if event.type == pygame.QUIT:
+                app.quit()
+                return
             
-            # Wait for mode selection
-            selecting = True
-            while selecting:
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        pygame.quit()
-                        return
-                    
-                    if event.type == pygame.MOUSEMOTION:
-                        vs_ai_button.check_hover(event.pos)
-                        vs_player_button.check_hover(event.pos)
-                        pygame.display.update()
-                        
-                    if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                        if vs_ai_button.is_clicked(event.pos):
-                            game_mode = MODE_VS_AI
-                            selecting = False
-                        elif vs_player_button.is_clicked(event.pos):
-                            game_mode = MODE_VS_PLAYER
-                            selecting = False
+            if event.type == pygame.WINDOWEXPOSED and game_state == STATE_PLAYING:
+                app.board_renderer.invalidate()  # Window contents were lost
             
-            # Set up the game
-            cards, ai_memory, player1_score, player2_score = setup_game()
-            current_player = 1  # Player 1 or human player goes first
-            game_state = STATE_PLAYING
+            if event.type == pygame.MOUSEWHEEL and game_state == STATE_PLAYING:
+                camera.zoom_at(event.y, *pygame.mouse.get_pos())
             
-        elif game_state == STATE_PLAYING:
-            # Draw current state
-            draw_board(cards, player1_score, player2_score, current_player, game_mode)
+            if event.type == pygame.MOUSEMOTION:
+                if game_state == STATE_PLAYING and event.buttons[2]:
+                    camera.scroll(-event.rel[0], -event.rel[1])  # Drag with the right button to pan
+                elif game_state != STATE_PLAYING:
+                    update_button_hover(buttons, event.pos)
             
-            # Handle events (even when AI is playing)
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    return
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                if game_state == STATE_MENU:
+                    vs_ai_button, vs_player_button, theme_button = buttons
+                    if theme_button.is_clicked(event.pos):
+                        # Next theme; its images load in the background while the menu stays live
+                        names = themes.list_themes()
+                        current = names.index(theme_loader.theme) if theme_loader.theme in names else -1
+                        theme_loader.load(names[(current + 1) % len(names)], CARD_SIZE - 2 * SPRITE_MARGIN)
+                        buttons = draw_start_menu(menu_lines)
+                    elif vs_ai_button.is_clicked(event.pos) or vs_player_button.is_clicked(event.pos):
+                        game_mode = MODE_VS_AI if vs_ai_button.is_clicked(event.pos) else MODE_VS_PLAYER
+                        
+                        # Set up the game
+                        game, ai = setup_game(game_mode, grid_size=grid_size, difficulty=difficulty)
+                        hovered_card = None
+                        scheduler.clear()
+                        history.clear()
+                        deal_cards(game.cards)
+                        if peek_time > 0:
+                            scheduler.after(DEAL_SPREAD + DEAL_DURATION,
+                                            lambda: peek_cards(game.cards, scheduler, peek_time))
+                        game_state = STATE_PLAYING
+                
+                elif game_state == STATE_PLAYING:
+                    # Clicks only count on a human player's turn
+                    if not (game_mode == MODE_VS_AI and game.current_player == 2) and not scheduler.pending() \
+                            and not tweener.animating("slide"):
+                        turn_start = game.snapshot() if practice_mode and not game.flipped else None
+                        if player_turn_handler(game, event.pos) and turn_start is not None:
+                            history.push(turn_start)
+                
+                elif game_state == STATE_GAME_OVER:
+                    if buttons[0].is_clicked(event.pos):
+                        game_state = STATE_MENU  # Go back to menu
+                        menu_lines = menu_stats_lines(difficulty)
+                        buttons = draw_start_menu(menu_lines)
             
-            # Check for game over
-            matches = sum(1 for card in cards if card.is_matched())
-            if matches == len(cards):
-                # Game over - wait for animations to finish
-                wait_for_animations(cards, player1_score, player2_score, current_player, game_mode)
-                game_state = STATE_GAME_OVER
-                continue
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.toggle_overlay()
             
-            # Take turn based on whose turn it is and game mode
-            if game_mode == MODE_VS_AI:
-                if current_player == 1:  # Human player
-                    continue_turn, points = player_turn_handler(cards, ai_memory, game_mode)
-                    player1_score += points
-                    if not continue_turn:
-                        current_player = 2  # Switch to AI
-                else:  # AI player
-                    continue_turn, points = ai_turn_handler(cards, ai_memory)
-                    player2_score += points
-                    if not continue_turn:
-                        current_player = 1  # Switch to human player
-            else:  # VS_PLAYER mode
-                continue_turn, points = player_turn_handler(cards, ai_memory, game_mode)
-                if current_player == 1:
-                    player1_score += points
-                    if not continue_turn:
-                        current_player = 2  # Switch to player 2
+            if event.type == pygame.KEYDOWN and pygame.key.get_mods() & pygame.KMOD_CTRL and game_state == STATE_PLAYING:
+                if event.key == pygame.K_s:
+                    savegame.save_game(game, game_mode, difficulty if game_mode == MODE_VS_AI else None, save_path)
+                    pygame.display.set_caption(f"Memory Match Game - saved to {save_path}")
+                elif event.key in (pygame.K_z, pygame.K_y) and practice_mode and board_idle(game, game_mode, scheduler):
+                    # Back to the start of the last turn, or forward again after an undo
+                    move = history.undo if event.key == pygame.K_z else history.redo
+                    state = move(game.snapshot())
+                    if state is not None:
+                        game.restore(state)
+            
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE and game_state == STATE_GAME_OVER:
+                app.quit()
+                return  # Exit game
+        
+        # Convert theme images the workers have finished, a few milliseconds' worth a frame
+        if theme_loader.poll():
+            if game_state == STATE_MENU:
+                buttons = draw_start_menu(menu_lines)  # Progress line
+            else:
+                app.board_renderer.invalidate()  # Faces already on screen change
+        
+        if game_state != STATE_PLAYING:
+            continue
+        
+        # Scroll with the arrow keys on boards bigger than the window
+        keys = pygame.key.get_pressed()
+        scroll_x = (keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]) * SCROLL_SPEED * dt / 1000
+        scroll_y = (keys[pygame.K_DOWN] - keys[pygame.K_UP]) * SCROLL_SPEED * dt / 1000
+        if scroll_x or scroll_y:
+            camera.scroll(scroll_x, scroll_y)
+        
+        # Advance animations and timed actions by the real time that passed
+        with profiler.span("animate_cards"):
+            animating = animate_cards(dt)
+        with profiler.span("scheduler"):
+            scheduler.update(dt)
+        # Timed actions can start tweens too, e.g. resolve_turn flipping a miss back down
+        animating = animating or bool(tweener)
+        
+        # Once the board is idle, decide what happens next
+        if not animating and not scheduler.pending():
+            if game.is_over():
+                game_state = STATE_GAME_OVER
+                if game_mode == MODE_VS_AI:
+                    mode, player1, player2 = stats.MODE_AI, "player", difficulty
                 else:
-                    player2_score += points
-                    if not continue_turn:
-                        current_player = 1  # Switch to player 1
-                        
-        elif game_state == STATE_GAME_OVER:
-            # Show game over screen and check if player wants to play again
-            if show_game_over(player1_score, player2_score, game_mode):
-                game_state = STATE_MENU  # Go back to menu
+                    mode, player1, player2 = stats.MODE_FRIEND, "player 1", "player 2"
+                if not practice_mode:
+                    record_result(mode, player1, player2, game, game.player1_score, game.player2_score, game.turns)
+                buttons = [draw_game_over(game.player1_score, game.player2_score, game_mode,
+                                          stats_line(mode, difficulty))]
+                continue
+            if game.turn_complete():
+                resolve_turn_handler(game, game_mode, scheduler)
+            elif game_mode == MODE_VS_AI and game.current_player == 2:
+                ai_turn_handler(game, ai, scheduler)
+        
+        # Hover follows the board as well as the mouse: cards flip under a still cursor, and the AI's turn has none
+        human_turn = not (game_mode == MODE_VS_AI and game.current_player == 2)
+        position = pygame.mouse.get_pos()
+        pointing = human_turn and pygame.mouse.get_focused() and position[1] < HEIGHT
+        hovered_card = update_card_hover(game.cards, position if pointing else None, hovered_card)
+        
+        if hint_overlay is not None:
+            hint_overlay.update(game, human_turn)
+        
+        with profiler.span("draw_board"):
+            draw_board(game.cards, game.player1_score, game.player2_score, game.current_player, game_mode)
+
+def replay_main(path, number):
+    """Play back a recorded game through the normal turn handlers and renderer."""
+    with recording.RecordingArchive(path) as archive:
+        replayed = archive[number]
+        game = replayed.new_game(card_factory=Card)
+        player = replayed.player(game)
+    app.start()
+    configure_board(game.rows, game.cols)
+    pygame.display.set_caption(f"Memory Match Game - Replay of game {number}")
+    pacer = FramePacer()
+    scheduler = Scheduler()
+    
+    while True:
+        # The finished game stays on screen without spinning
+        idle = game.is_over() and not tweener and not scheduler.pending() and not theme_loader.loading()
+        dt, events = pacer.next_frame(idle)
+        
+        for event in events:
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                app.quit()
+                return game
+            if event.type == pygame.MOUSEWHEEL:
+                camera.zoom_at(event.y, *pygame.mouse.get_pos())
+            if event.type == pygame.MOUSEMOTION and event.buttons[2]:
+                camera.scroll(-event.rel[0], -event.rel[1])
+        
+        if theme_loader.poll():
+            app.board_renderer.invalidate()
+        animate_cards(dt)
+        scheduler.update(dt)
+        
+        # Both players' flips come from the recording and land inside scheduler.update,
+        # so look at the board as it is now; it stays up once the game is over
+        if not tweener and not scheduler.pending() and not game.is_over():
+            if game.turn_complete():
+                resolve_turn_handler(game, MODE_VS_PLAYER, scheduler)
             else:
-                pygame.quit()
+                ai_turn_handler(game, player, scheduler)
+        
+        draw_board(game.cards, game.player1_score, game.player2_score, game.current_player, MODE_VS_PLAYER)
+
+class RemoteGame:
+    """Mirror of a match hosted by server.py, built only from the deltas it sends."""
+    def __init__(self, start):
+        self.me = start["you"]
+        self.rows, self.cols = start["rows"], start["cols"]
+        # Values stay unknown until the server turns a card face up
+        self.cards = [Card(None, *divmod(index, self.cols), index) for index in range(start["cards"])]
+        self.board = engine.BoardIndex(self.cards)
+        tweener.clear()
+        self.scores = [0, 0]
+        self.current_player = start["player"]
+        self.turns = 0
+        self.over = False
+        self.waiting_for_flip = False  # A click was sent and hasn't come back yet
+    
+    def apply(self, message, scheduler):
+        """Show one server message, pacing face-down and matched cards like a local game."""
+        kind = message["type"]
+        if kind == "flip":
+            card = self.cards[message["index"]]
+            card.value = message["value"]
+            card.flip_up()
+            if message["player"] == self.me:
+                self.waiting_for_flip = False
+        elif kind == "matched":
+            cards = [self.cards[index] for index in message["indices"]]
+            self.scores = message["scores"]
+            self.turns += 1
+            scheduler.after(AI_FLIP_DELAY, lambda: [card.set_matched() for card in cards])
+        elif kind == "hidden":
+            cards = [self.cards[index] for index in message["indices"]]
+            self.turns += 1
+            scheduler.after(FLIP_BACK_DELAY, lambda: [card.flip_down() for card in cards])
+        elif kind == "turn":
+            self.current_player = message["player"]
+        elif kind == "over":
+            self.scores = message["scores"]
+            self.over = True
+        elif kind == "error":
+            self.waiting_for_flip = False
+
+def draw_message(text):
+    """Full-screen status line, e.g. while waiting for the server."""
+    app.screen.fill(BG_COLOR)
+    message_text = render_text(MENU_FONT, text, TEXT_COLOR)
+    app.screen.blit(message_text, message_text.get_rect(center=(WIDTH//2, WINDOW_HEIGHT//2)))
+    pygame.display.flip()
+    app.board_renderer.invalidate()
+
+def network_main(host, port):
+    """Thin client for server.py: the server owns the board, this only renders and sends clicks."""
+    import netclient  # Pulls in asyncio, which only online play needs
+    
+    app.start()
+    pacer = FramePacer()
+    scheduler = Scheduler()
+    connection = netclient.Connection(host, port)
+    connection.join()
+    remote = None
+    buttons = []
+    incoming = []  # Server messages waiting for the board to settle
+    draw_message("Waiting for an opponent...")
+    
+    while True:
+        # Nothing to show until the server says something; the socket is still checked every idle frame
+        idle = not incoming and (remote is None or not (tweener or scheduler.pending()))
+        dt, events = pacer.next_frame(idle and not theme_loader.loading())
+        
+        for event in events:
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                connection.close()
+                app.quit()
                 return
+            
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                if remote is not None and remote.over and buttons and buttons[0].is_clicked(event.pos):
+                    # Play again: a new connection joins the queue for the next match
+                    connection.close()
+                    connection = netclient.Connection(host, port)
+                    connection.join()
+                    remote = None
+                    incoming = []
+                    scheduler.clear()
+                    draw_message("Waiting for an opponent...")
+                elif (remote is not None and not remote.over and remote.current_player == remote.me
+                      and not remote.waiting_for_flip and not incoming and not scheduler.pending()):
+                    card = get_card_at_position(remote.cards, event.pos) if event.pos[1] < HEIGHT else None
+                    if card is not None and card.is_available():
+                        connection.send({"type": "flip", "index": card.index})
+                        remote.waiting_for_flip = True
+        
+        incoming.extend(connection.poll())
+        if theme_loader.poll():
+            app.board_renderer.invalidate()
+        if remote is not None:
+            animate_cards(dt)
+        scheduler.update(dt)
+        
+        # Apply server messages one at a time, each once the previous one has played out
+        while incoming and (remote is None or not (tweener or scheduler.pending())):
+            message = incoming.pop(0)
+            if message["type"] == "start":
+                remote = RemoteGame(message)
+                configure_board(remote.rows, remote.cols)
+                pygame.display.set_caption(f"Memory Match Game - Online, you are Player {remote.me}")
+                app.board_renderer.invalidate()
+            elif message["type"] == "left":
+                draw_message("Your opponent left the match")
+                remote = None
+            elif remote is not None:
+                remote.apply(message, scheduler)
+                if remote.over:
+                    mine, theirs = remote.scores if remote.me == 1 else remote.scores[::-1]
+                    record_result(stats.MODE_ONLINE, "you", "opponent", remote, mine, theirs, remote.turns)
+        
+        if remote is None:
+            if connection.closed:
+                draw_message("Lost connection to the server")
+            continue
+        if remote.over and not tweener and not scheduler.pending():
+            if not buttons:
+                buttons = [draw_game_over(remote.scores[0], remote.scores[1], MODE_VS_PLAYER,
+                                          stats_line(stats.MODE_ONLINE))]
+            continue
+        buttons = []
+        draw_board(remote.cards, remote.scores[0], remote.scores[1], remote.current_player, MODE_VS_PLAYER)
 
 if __name__ == "__main__":
-    player1_score = 0
-    player2_score = 0
-    current_player = 1
-    main()
\ No newline at end of file
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Memory Match Game - 3 Card Matching")
+    parser.add_argument("--rows", type=int, default=GRID_SIZE)
+    parser.add_argument("--cols", type=int, default=GRID_SIZE)
+    parser.add_argument("--marathon", action="store_true", help="play on a 100x100 board")
+    parser.add_argument("--difficulty", default=AI_DIFFICULTY, choices=sorted(engine.AI_DIFFICULTIES) + ["expert", "montecarlo", "hints"])
+    parser.add_argument("--profile", action="store_true", help="record frame phase timings from the start")
+    parser.add_argument("--trace", help="write recorded timings as a Chrome trace to this file on exit")
+    parser.add_argument("--record", help="append every game played to this recording archive")
+    parser.add_argument("--replay", help="play back a game from this recording archive")
+    parser.add_argument("--game", type=int, default=0, help="which game of the --replay archive to show")
+    parser.add_argument("--connect", metavar="HOST:PORT", help="play online against another client of server.py")
+    parser.add_argument("--peek", type=float, default=PEEK_TIME / 1000, metavar="SECONDS",
+                        help="show every card for this long at the start of a game")
+    parser.add_argument("--hints", action="store_true",
+                        help="training mode: show each unseen card's likeliest values and odds of making a match")
+    parser.add_argument("--practice", action="store_true",
+                        help="allow undo (Ctrl+Z) and redo (Ctrl+Y); results aren't saved or recorded")
+    parser.add_argument("--save-file", default=savegame.SAVE_PATH, help="where Ctrl+S saves the game in progress")
+    parser.add_argument("--resume", action="store_true", help="carry on the game saved in --save-file")
+    parser.add_argument("--stats", default=stats.STATS_PATH, help="database that finished games are saved to")
+    parser.add_argument("--no-stats", action="store_true", help="don't save or show game results")
+    parser.add_argument("--startup-time", action="store_true",
+                        help="print the time from launch to the first menu frame and exit")
+    args = parser.parse_args()
+    
+    profiler.enabled = args.profile or bool(args.trace)
+    practice_mode = args.practice
+    show_hints = args.hints
+    save_path = args.save_file
+    resume = None
+    if args.resume:
+        try:
+            resume = savegame.load_game(save_path)
+        except (OSError, ValueError, KeyError) as e:
+            parser.error(f"can't resume from {save_path}: {e}")
+    difficulty = resume.difficulty if resume is not None and resume.difficulty else args.difficulty
+    if difficulty == "montecarlo" and not (args.replay or args.connect):
+        montecarlo.start_workers()  # Before the stats and theme threads start
+    if not args.no_stats:
+        stats_store = stats.StatsStore(args.stats)
+    if args.replay:
+        replay_main(args.replay, args.game)
+    elif args.connect:
+        host, _, port = args.connect.rpartition(":")
+        network_main(host or "127.0.0.1", int(port))
+    else:
+        if args.record:
+            recording_writer = recording.RecordingWriter(args.record)
+        main(MARATHON_GRID_SIZE if args.marathon else (args.rows, args.cols), args.difficulty, args.startup_time,
+             args.peek * 1000, resume)
+        if recording_writer is not None:
+            recording_writer.close()
+    if stats_store is not None:
+        stats_store.close()
+    if args.trace:
+        profiler.export_chrome_trace(args.trace)
+    if args.startup_time:
+        print(f"startup: {app.startup_time * 1000:.1f} ms to the first menu frame")
\ No newline at end of file
@@ -0,0 +1,147 @@
+"""Posterior card probabilities, and the hints and AI moves built on them.
+
+A player who remembers every flip knows the value of every card seen so
+far. The unseen cards hold the remaining copies of each value in uniformly
+random order, so each one is value v with probability unseen[v] / unseen
+cards. HintEngine keeps those counts in NumPy arrays, updated in O(1) as
+cards turn face up. The training-mode overlay writes the likeliest values
+on each face-down card nobody has seen yet. From the same counts
+HintEngine works out, for every face-down card at once, the chance that
+flipping it next ends the turn in a match. That is the heat the overlay
+shows and the move the "hints" AI plays.
+"""
+import random
+
+import numpy as np
+
+from engine import CARD_STATE_HIDDEN, MATCH_SIZE, AIMemory
+
+UNSEEN = 0  # known[] entry of a card nobody has seen; card values start at 1
+
+class HintEngine:
+    """Game observer with perfect memory that rates every face-down card; also a player."""
+    def __init__(self, rng=random):
+        self.rng = rng
+        self.memory = AIMemory()  # The cards seen, for snapshots and saved games like the other AIs
+        self.cards = None  # [card by index], filled in from the first board seen
+        self.known = None  # Value of each card index once seen, UNSEEN before
+        self.unseen = None  # Unseen copies of each value; [UNSEEN] is unused
+        self.unseen_total = 0
+        self.version = 0  # Bumped whenever the probabilities may have changed
+        self.likely_key = None  # (version, count) likely_unseen was worked out for
+        self.likely_unseen = ()
+
+    def attach(self, board):
+        """Size the arrays for a board the first time it is seen."""
+        if self.cards is not None and len(self.cards) == len(board.states):
+            return
+        self.cards = [None] * len(board.states)
+        for group in (board.hidden, board.revealed, board.matched):
+            for card in group:
+                self.cards[card.index] = card
+        self.rebuild(board)
+
+    def rebuild(self, board):
+        """Recount from memory and the matched cards, e.g. after Game.restore()."""
+        card_count = len(board.states)
+        self.known = np.zeros(card_count, np.int32)
+        self.unseen = np.full(card_count // MATCH_SIZE + 1, MATCH_SIZE, np.int32)
+        self.unseen[UNSEEN] = 0
+        for index, (card, _) in self.memory.recent.items():
+            self.known[index] = card.value
+        for card in board.matched:
+            self.known[card.index] = card.value
+        seen = self.known[self.known != UNSEEN]
+        self.unseen -= np.bincount(seen, minlength=len(self.unseen)).astype(np.int32)
+        self.unseen_total = card_count - len(seen)
+        self.version += 1
+
+    def remember(self, card):
+        self.attach(card.board)
+        self.memory.remember(card)
+        if self.known[card.index] == UNSEEN:
+            self.known[card.index] = card.value
+            self.unseen[card.value] -= 1
+            self.unseen_total -= 1
+        self.version += 1
+
+    def forget(self, value):
+        self.memory.forget(value)  # Its cards stay known; they are no longer face down
+        self.version += 1
+
+    def end_turn(self):
+        self.memory.end_turn()
+        self.version += 1
+
+    def posterior(self, index):
+        """Probability of each value (index 0 unused) for one card, given every flip so far."""
+        value = self.known[index]
+        if value != UNSEEN:
+            probabilities = np.zeros(len(self.unseen))
+            probabilities[value] = 1.0
+            return probabilities
+        return self.unseen / max(1, self.unseen_total)
+
+    def likely_values(self, index, count):
+        """Up to count (value, probability) pairs for one card, likeliest first."""
+        value = self.known[index]
+        if value != UNSEEN:
+            return ((int(value), 1.0),)
+        # Every unseen card has the same posterior, so it is ranked once per change
+        if self.likely_key != (self.version, count):
+            probabilities = self.posterior(index)
+            order = np.argsort(-probabilities, kind="stable")[:count]
+            self.likely_unseen = tuple((int(value), float(probabilities[value]))
+                                       for value in order if probabilities[value] > 0)
+            self.likely_key = (self.version, count)
+        return self.likely_unseen
+
+    def completion_odds(self):
+        """odds[c]: chance of turning up c given unseen copies in the next c unseen flips."""
+        odds = np.ones(MATCH_SIZE + 1)
+        for copies in range(1, MATCH_SIZE + 1):
+            for drawn in range(copies):
+                remaining = self.unseen_total - drawn
+                odds[copies] *= (copies - drawn) / remaining if remaining > 0 else 0.0
+        return odds
+
+    def match_probabilities(self, board, flipped):
+        """Chance, per card index, that flipping it next ends this turn in a match; 0 if it can't be flipped."""
+        self.attach(board)
+        odds = self.completion_odds()
+        # by_value[v] rates a known card of value v; by_value[UNSEEN] rates every unseen card
+        if not flipped:
+            # Flipping a known card commits to its value: every unseen copy must turn up next
+            by_value = odds[self.unseen]
+            # An unseen card is value v with chance unseen[v] / unseen_total, then needs the other copies
+            values_by_copies = np.bincount(self.unseen[1:], minlength=MATCH_SIZE + 1)
+            values_by_copies[0] = 0  # Fully seen values can't turn up
+            by_value[UNSEEN] = values_by_copies @ odds
+        elif all(card.value == flipped[0].value for card in flipped):
+            # Known or not, the turn matches only if every unseen copy of the value turns up
+            value = flipped[0].value
+            by_value = np.zeros(len(self.unseen))
+            by_value[value] = by_value[UNSEEN] = odds[self.unseen[value]]
+        else:
+            by_value = np.zeros(len(self.unseen))  # Already a miss
+        probabilities = by_value[self.known]
+        probabilities[np.frombuffer(board.states, np.uint8) != CARD_STATE_HIDDEN] = 0.0
+        return probabilities
+
+    def choose_card(self, board, flipped):
+        """The face-down card most likely to complete a match this turn."""
+        if not board.hidden:
+            return None
+        probabilities = self.match_probabilities(board, flipped)
+        hidden = np.frombuffer(board.states, np.uint8) == CARD_STATE_HIDDEN
+        best = probabilities.max()
+        candidates = np.flatnonzero(hidden & (probabilities == best))
+        if best > 0:
+            # At equal odds a known card shows the opponent nothing new
+            preferred = candidates[self.known[candidates] != UNSEEN]
+        else:
+            # The turn is lost; an unseen card at least teaches us something
+            preferred = np.flatnonzero(hidden & (self.known == UNSEEN))
+        if len(preferred):
+            candidates = preferred
+        return self.cards[candidates[self.rng.randrange(len(candidates))]]
@@ -0,0 +1,197 @@
+"""Load test for server.py: many simulated clients playing matches on localhost.
+
+Each simulated client plays like the hard memory AI using only what the
+server tells it. It times every flip from sending it to seeing the server's
+broadcast of it. The server runs in its own process, so its CPU time (from
+the "stats" message) gives matches per core.
+
+Usage: python loadtest.py --matches 5000 --concurrent 1000
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from engine import MATCH_SIZE
+from server import DEFAULT_HOST, decode, encode
+
+class SimulatedClient:
+    """Plays from the deltas alone: remembers every value the server reveals."""
+    def __init__(self, rng):
+        self.rng = rng
+        self.known = {}  # {index: value} for unmatched cards seen face up
+        self.face_down = []
+        self.flipped = []  # Indices face up this turn
+
+    def start(self, message):
+        self.known.clear()
+        self.face_down = list(range(message["cards"]))
+        self.flipped = []
+
+    def apply(self, message):
+        kind = message["type"]
+        if kind == "flip":
+            self.known[message["index"]] = message["value"]
+            self.face_down.remove(message["index"])
+            self.flipped.append(message["index"])
+        elif kind == "matched":
+            for index in message["indices"]:
+                del self.known[index]
+            self.flipped = []
+        elif kind == "hidden":
+            self.face_down.extend(message["indices"])
+            self.flipped = []
+
+    def choose(self):
+        """Next card index, memory AI style."""
+        by_value = {}
+        for index in self.face_down:
+            if index in self.known:
+                by_value.setdefault(self.known[index], []).append(index)
+        if self.flipped:
+            value = self.known[self.flipped[0]]
+            if all(self.known[index] == value for index in self.flipped) and by_value.get(value):
+                return by_value[value][0]
+        else:
+            for positions in by_value.values():
+                if len(positions) == MATCH_SIZE:
+                    return positions[0]
+        unseen = [index for index in self.face_down if index not in self.known]
+        return self.rng.choice(unseen or self.face_down)
+
+async def play_match(host, port, rng, latencies):
+    """Connect, play one match to the end and return True if it finished."""
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(encode({"type": "join"}))
+    client = SimulatedClient(rng)
+    me = None
+    sent_at = None
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                return False
+            message = decode(line)
+            kind = message["type"]
+            if kind == "start":
+                me = message["you"]
+                client.start(message)
+                current = message["player"]
+            elif kind in ("left", "error"):
+                return False
+            elif kind == "over":
+                return True
+            else:
+                client.apply(message)
+                if kind == "flip" and sent_at is not None and message["player"] == me:
+                    latencies.append(time.perf_counter() - sent_at)
+                    sent_at = None
+                if kind == "turn":
+                    current = message["player"]
+
+            # Flip once the previous flip has come back, so latencies don't overlap; a missed
+            # turn is followed by a "turn" message, so wait for that before playing on
+            if (me == current and sent_at is None and kind != "hidden" and client.face_down
+                    and len(client.flipped) < MATCH_SIZE):
+                writer.write(encode({"type": "flip", "index": client.choose()}))
+                sent_at = time.perf_counter()
+    finally:
+        writer.close()
+
+async def query_stats(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(encode({"type": "stats"}))
+    try:
+        return decode(await reader.readline())
+    finally:
+        writer.close()
+
+async def run_load(host, port, matches, concurrent, seed=0):
+    rng = random.Random(seed)
+    latencies = []
+    remaining = [matches * 2]  # Client connections still to make
+    finished = [0]
+
+    async def worker():
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            if await play_match(host, port, rng, latencies):
+                finished[0] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrent * 2)))
+    elapsed = time.perf_counter() - start
+    return finished[0] // 2, elapsed, latencies
+
+def load_process(task):
+    """One load-generating process; a single process can't keep a fast server busy."""
+    port, matches, concurrent, seed = task
+    return asyncio.run(run_load(DEFAULT_HOST, port, matches, concurrent, seed))
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((DEFAULT_HOST, 0))
+        return sock.getsockname()[1]
+
+def start_server(port):
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py")
+    process = subprocess.Popen([sys.executable, script, "--port", str(port)], stdout=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection((DEFAULT_HOST, port), timeout=0.1).close()
+            return process
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("server didn't start")
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the match server with simulated clients.")
+    parser.add_argument("--matches", type=int, default=2000, help="matches to play in total")
+    parser.add_argument("--concurrent", type=int, default=500, help="matches in progress at once")
+    parser.add_argument("--port", type=int, help="use a server already running on this port")
+    parser.add_argument("--processes", type=int, default=max(1, (os.cpu_count() or 2) - 1),
+                        help="client processes generating the load")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    port = args.port or free_port()
+    server = None if args.port else start_server(port)
+    try:
+        before = asyncio.run(query_stats(DEFAULT_HOST, port))
+        tasks = [(port, args.matches // args.processes + (number < args.matches % args.processes),
+                  max(1, args.concurrent // args.processes), args.seed + number)
+                 for number in range(args.processes)]
+        with multiprocessing.Pool(args.processes) as pool:
+            results = pool.map(load_process, tasks)
+        played = sum(result[0] for result in results)
+        elapsed = max(result[1] for result in results)
+        latencies = [latency for result in results for latency in result[2]]
+        after = asyncio.run(query_stats(DEFAULT_HOST, port))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    cpu_seconds = after["cpu_seconds"] - before["cpu_seconds"]
+    messages = after["messages_in"] - before["messages_in"]
+    latencies.sort()
+    print(f"matches finished: {played} in {elapsed:.2f}s ({played / elapsed:.0f} matches/s, "
+          f"{args.concurrent} concurrent from {args.processes} client processes)")
+    print(f"server: {cpu_seconds:.2f} CPU s, {played / cpu_seconds:.0f} matches per core-second, "
+          f"{messages / cpu_seconds:.0f} client messages per core-second")
+    print(f"flip round trip: p50 {statistics.median(latencies) * 1000:.2f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms, max {latencies[-1] * 1000:.2f} ms "
+          f"over {len(latencies)} flips")
+
+if __name__ == "__main__":
+    main()
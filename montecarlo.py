@@ -0,0 +1,226 @@
+"""Anytime Monte Carlo AI using determinization sampling.
+
+Each sample deals the unseen cards out at random, consistent with everything
+revealed so far, then plays every candidate flip out to the end of the game
+with the greedy memory AI on both sides. The flip with the best average score
+margin wins. Samples run on a process pool until the per-move time budget runs
+out, so the AI gets stronger with more cores and more time.
+"""
+import atexit
+import multiprocessing
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from engine import MATCH_SIZE, AIMemory, IndexedSet
+
+MOVE_BUDGET_MS = 200
+WORKERS = max(1, (os.cpu_count() or 2) - 1)  # Leave a core for the frame loop
+CANDIDATE_UNKNOWN = -1  # Stands for "any card nobody has seen"; they're all alike
+
+def rollout(values, known, flipped, first_pick, rng):
+    """Finish the game greedily from the current turn; return the mover's score margin.
+
+    values maps every unmatched card index to its (sampled) value, known is
+    the set of indices both players have seen and flipped the indices face
+    up this turn.
+    """
+    face_down = IndexedSet(index for index in values if index not in flipped)
+    known_by_value = {}  # {value: [index, ...]}
+    complete = {}  # Values with every card known, used as an ordered set
+
+    def remember(index):
+        positions = known_by_value.setdefault(values[index], [])
+        if index not in positions:
+            positions.append(index)
+            if len(positions) == MATCH_SIZE:
+                complete[values[index]] = None
+
+    def greedy_pick(turn):
+        if not turn and complete:
+            return known_by_value[next(iter(complete))][0]
+        if turn and all(values[index] == values[turn[0]] for index in turn):
+            for index in known_by_value.get(values[turn[0]], ()):
+                if index in face_down:
+                    return index
+        return face_down.choice(rng)
+
+    for index in known:
+        remember(index)
+
+    margin = 0
+    sign = 1  # +1 while the mover is playing
+    turn = list(flipped)
+    pick = first_pick
+    while True:
+        while len(turn) < MATCH_SIZE:
+            if pick is None:
+                pick = greedy_pick(turn)
+            face_down.discard(pick)
+            turn.append(pick)
+            remember(pick)
+            pick = None
+
+        value = values[turn[0]]
+        if all(values[index] == value for index in turn):
+            margin += sign
+            known_by_value.pop(value, None)
+            complete.pop(value, None)
+        else:
+            for index in turn:
+                face_down.add(index)
+            sign = -sign
+        turn = []
+        if not face_down:
+            return margin
+
+def run_samples(snapshot, candidates, budget, max_samples, seed):
+    """Score candidates over as many samples as fit in `budget` seconds."""
+    known, unknown_slots, unknown_values, flipped = snapshot
+    deadline = time.perf_counter() + budget if budget is not None else None
+    rng = random.Random(seed)
+    totals = [0] * len(candidates)
+    samples = 0
+
+    while samples < max_samples and (deadline is None or time.perf_counter() < deadline):
+        # Deal the unseen values out over the unseen cards
+        dealt = list(unknown_values)
+        rng.shuffle(dealt)
+        values = dict(known)
+        values.update(zip(unknown_slots, dealt))
+
+        for position, candidate in enumerate(candidates):
+            if candidate == CANDIDATE_UNKNOWN:
+                candidate = rng.choice(unknown_slots)
+            totals[position] += rollout(values, known, flipped, candidate, rng)
+        samples += 1
+    return totals, samples
+
+_executor = None
+
+def get_executor(workers=WORKERS):
+    """Shared worker pool, started the first time a pooled AI thinks unless start_workers() ran first."""
+    global _executor
+    if _executor is None:
+        # Spawned, not forked: the game process has threads running and a display open by then
+        _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        atexit.register(_executor.shutdown, cancel_futures=True)
+    return _executor
+
+def start_workers(workers=WORKERS):
+    """Start the pool's processes now, before the caller starts threads, rather than on the first move."""
+    executor = get_executor(workers)
+    for future in [executor.submit(int) for _ in range(workers)]:
+        future.result()
+
+class PendingChoice:
+    """A flip being decided in the background; poll done() from the frame loop."""
+    def __init__(self, ai, board, candidates, futures=None, results=None, card=None):
+        self.ai = ai
+        self.board = board
+        self.candidates = candidates
+        self.futures = futures or []
+        self.results = results or []
+        self.card = card
+
+    def done(self):
+        return self.card is not None or all(future.done() for future in self.futures)
+
+    def result(self):
+        """The chosen card, waiting for the workers if they're still running."""
+        if self.card is None:
+            results = self.results + [future.result() for future in self.futures]
+            totals = [sum(result[0][position] for result in results)
+                      for position in range(len(self.candidates))]
+            best = max(range(len(self.candidates)), key=totals.__getitem__)
+            self.card = self.ai.card_for(self.board, self.candidates[best])
+        return self.card
+
+class MonteCarloAI:
+    """Strong AI that never forgets and samples the unseen cards before each flip."""
+    def __init__(self, rng=random, budget_ms=MOVE_BUDGET_MS, workers=None, max_samples=100000):
+        self.rng = rng
+        self.budget_ms = budget_ms  # None means stop on max_samples only
+        self.workers = WORKERS if workers is None else workers  # 0 runs inline
+        self.max_samples = max_samples
+        self.memory = AIMemory()
+
+    def remember(self, card):
+        self.memory.remember(card)
+
+    def forget(self, value):
+        self.memory.forget(value)
+
+    def end_turn(self):
+        self.memory.end_turn()
+
+    def snapshot(self, board, flipped):
+        """Picklable view of what the AI knows: (known, unknown_slots, unknown_values, flipped)."""
+        # Cards still turning face down from the last turn count as unmatched too
+        unmatched = {card.index for card in board.hidden}
+        unmatched.update(card.index for card in board.revealed)
+        known = {index: card.value for index, (card, _) in self.memory.recent.items() if index in unmatched}
+        unknown_slots = [index for index in unmatched if index not in known]
+
+        # Every unmatched value still has MATCH_SIZE cards; the unknown ones are unseen
+        total_values = (len(board.hidden) + len(board.revealed) + len(board.matched)) // MATCH_SIZE
+        matched_values = {card.value for card in board.matched}
+        known_counts = Counter(known.values())
+        unknown_values = [value for value in range(1, total_values + 1) if value not in matched_values
+                          for _ in range(MATCH_SIZE - known_counts[value])]
+        return known, unknown_slots, unknown_values, [card.index for card in flipped]
+
+    def request_card(self, board, flipped):
+        """Start deciding the next flip and return a PendingChoice right away."""
+        # Obvious moves don't need sampling: play a fully known value, finish a known match
+        if not flipped:
+            potential_match = self.memory.known_match()
+            if potential_match:
+                return PendingChoice(self, board, [], card=potential_match[0])
+        elif len(flipped) == MATCH_SIZE - 1 and all(card.value == flipped[0].value for card in flipped):
+            for card in self.memory.cards(flipped[0].value):
+                if card.is_available():
+                    return PendingChoice(self, board, [], card=card)
+
+        snapshot = self.snapshot(board, flipped)
+        known, unknown_slots = snapshot[0], snapshot[1]
+
+        # One candidate per known value (its cards are interchangeable), plus any unseen card
+        candidates = []
+        seen_values = set()
+        for index, value in known.items():
+            if index not in snapshot[3] and value not in seen_values:
+                seen_values.add(value)
+                candidates.append(index)
+        if unknown_slots:
+            candidates.append(CANDIDATE_UNKNOWN)
+        if len(candidates) == 1:
+            return PendingChoice(self, board, candidates, card=self.card_for(board, candidates[0]))
+
+        budget = self.budget_ms / 1000 if self.budget_ms is not None else None
+        if not self.workers:
+            result = run_samples(snapshot, candidates, budget, self.max_samples, self.rng.random())
+            return PendingChoice(self, board, candidates, results=[result])
+
+        executor = get_executor(self.workers)
+        samples_each = -(-self.max_samples // self.workers)
+        futures = [executor.submit(run_samples, snapshot, candidates, budget, samples_each, self.rng.random())
+                   for _ in range(self.workers)]
+        return PendingChoice(self, board, candidates, futures=futures)
+
+    def choose_card(self, board, flipped):
+        """Pick the next card to flip, blocking until the samples are in."""
+        return self.request_card(board, flipped).result()
+
+    def card_for(self, board, candidate):
+        """The card to flip for a candidate index."""
+        if candidate != CANDIDATE_UNKNOWN:
+            return self.memory.recent[candidate][0]
+        for _ in range(8):
+            card = board.hidden.choice(self.rng)
+            if card.index not in self.memory.recent:
+                return card
+        unseen = [card for card in board.hidden if card.index not in self.memory.recent]
+        return self.rng.choice(unseen)
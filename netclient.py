@@ -0,0 +1,54 @@
+"""Non-blocking connection to server.py for clients that run a frame loop."""
+import socket
+
+from server import decode, encode
+
+class Connection:
+    """send() and poll() never wait, so they can be called once per frame."""
+    def __init__(self, host, port):
+        self.sock = socket.create_connection((host, port))
+        self.sock.setblocking(False)
+        self.incoming = b""
+        self.outgoing = b""
+        self.closed = False
+
+    def join(self):
+        """Ask the server for a match."""
+        self.send({"type": "join"})
+
+    def send(self, message):
+        self.outgoing += encode(message)
+        self.flush()
+
+    def flush(self):
+        while self.outgoing and not self.closed:
+            try:
+                sent = self.sock.send(self.outgoing)
+            except BlockingIOError:
+                return
+            except OSError:
+                self.closed = True
+                return
+            self.outgoing = self.outgoing[sent:]
+
+    def poll(self):
+        """Every complete message that has arrived since the last call."""
+        self.flush()
+        while not self.closed:
+            try:
+                data = self.sock.recv(65536)
+            except BlockingIOError:
+                break
+            except OSError:
+                data = b""
+            if not data:
+                self.closed = True
+                break
+            self.incoming += data
+
+        *lines, self.incoming = self.incoming.split(b"\n")
+        return [decode(line) for line in lines if line]
+
+    def close(self):
+        self.closed = True
+        self.sock.close()
@@ -0,0 +1,139 @@
+"""Per-frame timings of the main loop phases, kept in fixed-size ring buffers.
+
+A disabled profiler hands out one shared do-nothing span, so the calls can
+stay in the frame loop for good. Exported traces open in chrome://tracing or
+https://ui.perfetto.dev.
+"""
+import json
+import time
+from collections import deque
+
+EVENT_CAPACITY = 100000  # Spans and counters kept; the oldest drop off first
+FRAME_CAPACITY = 600  # Frame times kept for the overlay, 10 s at 60 fps
+OVERLAY_REFRESH = 30  # Frames between overlay text updates, so it stays readable
+OVERLAY_REFRESH_SECONDS = 1.0  # Idle loops draw rarely, so refresh on time as well
+
+class Span:
+    """Times a `with` block and records it on the profiler."""
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.events.append(("X", self.name, self.start, time.perf_counter() - self.start))
+
+class NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+NULL_SPAN = NullSpan()
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+class Profiler:
+    """Records named spans and counters while enabled; ring buffers bound the memory."""
+    def __init__(self, enabled=False, event_capacity=EVENT_CAPACITY, frame_capacity=FRAME_CAPACITY):
+        self.enabled = enabled
+        self.overlay = False  # Show FPS and frame times in the score panel
+        self.events = deque(maxlen=event_capacity)  # ("X", name, start, duration) or ("C", name, time, values)
+        self.frame_times = deque(maxlen=frame_capacity)  # Milliseconds between frame starts
+        self.frame_start = None
+        self.frames = 0
+        self.overlay_cache = (None, None, "")  # (frames and time when computed, text)
+        # Loop wakeups and CPU time are counted even while disabled; they are what idle costs
+        self.wakeups = 0
+        self.activity_start = (time.perf_counter(), time.process_time())
+
+    def span(self, name):
+        """Context manager timing a block as `name`."""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name)
+
+    def counter(self, name, values):
+        """Record named values, e.g. milliseconds per card state, at this moment."""
+        if self.enabled:
+            self.events.append(("C", name, time.perf_counter(), values))
+
+    def begin_frame(self, idle=False):
+        """Call at the top of every frame; the time since the last call is the frame time.
+
+        A frame that started after an idle wait for events is counted as a
+        wakeup but not timed, since the wait says nothing about drawing speed.
+        """
+        now = time.perf_counter()
+        self.wakeups += 1
+        if self.enabled and self.frame_start is not None and not idle:
+            self.frame_times.append((now - self.frame_start) * 1000)
+            self.events.append(("X", "frame", self.frame_start, now - self.frame_start))
+            self.frames += 1
+        self.frame_start = now
+
+    def activity(self):
+        """(wakeups per second, CPU time as a fraction of one core) since reset_activity()."""
+        wall_start, cpu_start = self.activity_start
+        elapsed = max(time.perf_counter() - wall_start, 1e-9)
+        return self.wakeups / elapsed, (time.process_time() - cpu_start) / elapsed
+
+    def reset_activity(self):
+        self.wakeups = 0
+        self.activity_start = (time.perf_counter(), time.process_time())
+
+    def toggle_overlay(self):
+        """Show or hide the overlay; showing it starts recording."""
+        self.overlay = not self.overlay
+        if self.overlay:
+            self.enabled = True
+
+    def stats(self):
+        """(fps, p50 ms, p99 ms) over the recent frames, or None before any frame."""
+        if not self.frame_times:
+            return None
+        times = sorted(self.frame_times)
+        return 1000 * len(times) / sum(times), percentile(times, 0.5), percentile(times, 0.99)
+
+    def overlay_text(self):
+        computed_at, computed_time, text = self.overlay_cache
+        now = time.perf_counter()
+        if (computed_at is None or self.frames - computed_at >= OVERLAY_REFRESH
+                or now - computed_time >= OVERLAY_REFRESH_SECONDS):
+            stats = self.stats()
+            text = "FPS --" if stats is None else "FPS {:.0f}  p50 {:.1f} ms  p99 {:.1f} ms".format(*stats)
+            wakeups, cpu = self.activity()
+            text += f"  CPU {cpu:.0%}  {wakeups:.0f} wakeups/s"
+            self.reset_activity()  # The next refresh covers the time since this one
+            self.overlay_cache = (self.frames, now, text)
+        return text
+
+    def clear(self):
+        self.events.clear()
+        self.frame_times.clear()
+        self.frame_start = None
+
+    def chrome_trace(self):
+        """Recorded events in Chrome's trace-event format (microsecond timestamps)."""
+        trace_events = []
+        for kind, name, start, data in self.events:
+            event = {"name": name, "ph": kind, "ts": start * 1e6, "pid": 1, "tid": 1}
+            if kind == "X":
+                event["dur"] = data * 1e6
+            else:
+                event["args"] = data
+            trace_events.append(event)
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path):
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
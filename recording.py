@@ -0,0 +1,283 @@
+"""Compact binary game recordings: a seed plus the cards flipped each turn.
+
+An archive holds any number of games back to back. Each game is a header
+(tag, seed, rows, cols) followed by one record per turn: a flags byte (mover,
+match) and the flipped card indices. The seed rebuilds the shuffled board, so
+replaying the flips reproduces the whole game. A side file of 64-bit offsets
+finds game N without reading the ones before it; both files are read through
+mmap, so opening an archive of millions of games costs next to nothing.
+
+Usage: python recording.py record games.mmr --games 10000
+       python recording.py verify games.mmr
+       python recording.py show games.mmr 42
+"""
+import argparse
+import mmap
+import os
+import queue
+import random
+import struct
+import threading
+import time
+
+import engine
+from engine import MATCH_SIZE
+
+INDEX_SUFFIX = ".idx"
+GAME_TAG = 0xFF  # Never a valid turn flags byte
+GAME_HEADER = struct.Struct("<BQHH")  # tag, seed, rows, cols
+INDEX_ENTRY = struct.Struct("<Q")  # Byte offset of a game header
+FLAG_PLAYER2 = 1
+FLAG_MATCH = 2
+SEED_LIMIT = 2 ** 64
+
+def turn_struct(card_count):
+    """Turn record layout; boards up to 65535 cards get 16-bit indices."""
+    index_format = "H" if card_count <= 0xFFFF else "I"
+    return struct.Struct(f"<B{MATCH_SIZE}{index_format}")
+
+def new_seed():
+    return random.randrange(SEED_LIMIT)
+
+class RecordingWriter:
+    """Appends games to an archive; a background thread does the disk writes."""
+    def __init__(self, path):
+        self.data_file = open(path, "ab")
+        self.index_file = open(path + INDEX_SUFFIX, "ab")
+        self.offset = self.data_file.tell()
+        self.turn_format = None
+        self.queue = queue.Queue()  # (bytes, game offset or None); None stops the thread
+        self.thread = threading.Thread(target=self.write_loop, daemon=True)
+        self.thread.start()
+
+    def begin_game(self, seed, rows, cols):
+        header = GAME_HEADER.pack(GAME_TAG, seed, rows, cols)
+        self.turn_format = turn_struct(rows * cols)
+        self.queue.put((header, self.offset))
+        self.offset += len(header)
+
+    def add_turn(self, player, matched, flips):
+        flags = (FLAG_PLAYER2 if player == 2 else 0) | (FLAG_MATCH if matched else 0)
+        record = self.turn_format.pack(flags, *flips)
+        self.queue.put((record, None))
+        self.offset += len(record)
+
+    def write_loop(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            data, game_offset = item
+            self.data_file.write(data)
+            if game_offset is not None:
+                # The header goes out first, so the index never points past the data
+                self.data_file.flush()
+                self.index_file.write(INDEX_ENTRY.pack(game_offset))
+            if self.queue.empty():
+                self.data_file.flush()
+                self.index_file.flush()
+
+    def close(self):
+        """Finish the queued writes and close both files."""
+        self.queue.put(None)
+        self.thread.join()
+        self.data_file.close()
+        self.index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class GameRecorder:
+    """Game observer that writes every turn as it is resolved."""
+    def __init__(self, writer, seed, rows, cols):
+        self.writer = writer
+        self.flips = []
+        self.values = []
+        self.current_player = 1
+        writer.begin_game(seed, rows, cols)
+
+    def remember(self, card):
+        self.flips.append(card.index)
+        self.values.append(card.value)
+
+    def forget(self, value):
+        pass
+
+    def end_turn(self):
+        matched = len(set(self.values)) == 1
+        self.writer.add_turn(self.current_player, matched, self.flips)
+        if not matched:
+            self.current_player = 2 if self.current_player == 1 else 1
+        self.flips = []
+        self.values = []
+
+class Recording:
+    """One recorded game, decoded straight from the archive's memory map."""
+    def __init__(self, buffer, start, end):
+        _, self.seed, self.rows, self.cols = GAME_HEADER.unpack_from(buffer, start)
+        self.buffer = buffer
+        self.start = start + GAME_HEADER.size
+        self.turn_format = turn_struct(self.rows * self.cols)
+        self.turn_count = (end - self.start) // self.turn_format.size
+
+    def turns(self):
+        """(player, matched, flipped card indices) for every turn in order."""
+        for flags, *flips in self.turn_format.iter_unpack(
+                self.buffer[self.start:self.start + self.turn_count * self.turn_format.size]):
+            yield (2 if flags & FLAG_PLAYER2 else 1), bool(flags & FLAG_MATCH), flips
+
+    def new_game(self, card_factory=engine.Card):
+        """Fresh game with the same shuffled board."""
+        return engine.Game((self.rows, self.cols), random.Random(self.seed), card_factory)
+
+    def player(self, game):
+        """Player that flips the recorded cards of `game` in order, for the turn handlers."""
+        return ReplayPlayer(game, self)
+
+class ReplayPlayer:
+    def __init__(self, game, recording):
+        self.game = game
+        self.flips = [index for _, _, flips in recording.turns() for index in flips]
+        self.position = 0
+
+    def choose_card(self, board, flipped):
+        if self.position == len(self.flips):
+            return None
+        card = self.game.cards[self.flips[self.position]]
+        if not card.is_available():
+            return None  # Still turning face down; asked again once the board is idle
+        self.position += 1
+        return card
+
+class RecordingArchive:
+    """Random access to the games in an archive, N-th game in constant time."""
+    def __init__(self, path):
+        self.data_file = open(path, "rb")
+        self.data = self.map(self.data_file)
+        index_path = path + INDEX_SUFFIX
+        if os.path.exists(index_path):
+            self.index_file = open(index_path, "rb")
+            self.index = self.map(self.index_file)
+        else:
+            self.index_file = None
+            self.index = self.scan_index()
+
+    @staticmethod
+    def map(file):
+        if os.fstat(file.fileno()).st_size == 0:
+            return b""  # mmap can't map an empty file
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def scan_index(self):
+        """Index rebuilt by walking the archive, for when the side file is missing."""
+        offsets = bytearray()
+        position = 0
+        turn_size = 0
+        while position < len(self.data):
+            if self.data[position] == GAME_TAG:
+                offsets += INDEX_ENTRY.pack(position)
+                _, _, rows, cols = GAME_HEADER.unpack_from(self.data, position)
+                turn_size = turn_struct(rows * cols).size
+                position += GAME_HEADER.size
+            else:
+                position += turn_size
+        return bytes(offsets)
+
+    def __len__(self):
+        return len(self.index) // INDEX_ENTRY.size
+
+    def __getitem__(self, number):
+        if number < 0:
+            number += len(self)
+        if not 0 <= number < len(self):
+            raise IndexError("game number out of range")
+        start, = INDEX_ENTRY.unpack_from(self.index, number * INDEX_ENTRY.size)
+        if number + 1 < len(self):
+            end, = INDEX_ENTRY.unpack_from(self.index, (number + 1) * INDEX_ENTRY.size)
+        else:
+            end = len(self.data)
+        return Recording(self.data, start, end)
+
+    def __iter__(self):
+        for number in range(len(self)):
+            yield self[number]
+
+    def close(self):
+        for mapped in (self.data, self.index):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+        self.data_file.close()
+        if self.index_file:
+            self.index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def replay(recording, card_factory=engine.Card, verify=True):
+    """Re-run a recording headlessly as fast as possible and return the finished game."""
+    game = recording.new_game(card_factory)
+    for turn, (player, matched, flips) in enumerate(recording.turns()):
+        if verify and player != game.current_player:
+            raise ValueError(f"turn {turn}: recorded player {player}, replay has player {game.current_player}")
+        for index in flips:
+            if not game.flip(game.cards[index]) and verify:
+                raise ValueError(f"turn {turn}: card {index} can't be flipped")
+        if verify and game.is_match() != matched:
+            raise ValueError(f"turn {turn}: recorded match {matched}, replay disagrees")
+        game.resolve_turn()
+    return game
+
+def record_games(path, games, players=(engine.MemoryAI, engine.MemoryAI), grid_size=engine.GRID_SIZE, seed=0):
+    """Play and record AI games; game i uses seed `seed + i`."""
+    rows, cols = engine.board_shape(grid_size)
+    with RecordingWriter(path) as writer:
+        for game_index in range(games):
+            game_seed = (seed + game_index) % SEED_LIMIT
+            recorder = GameRecorder(writer, game_seed, rows, cols)
+            engine.play_game(players, grid_size, game_seed, observers=[recorder])
+
+def main():
+    parser = argparse.ArgumentParser(description="Record, verify and inspect game archives.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="append AI-vs-AI games to an archive")
+    record.add_argument("path")
+    record.add_argument("--games", type=int, default=1000)
+    record.add_argument("--grid-size", type=int, default=engine.GRID_SIZE)
+    record.add_argument("--seed", type=int, default=0)
+    verify = commands.add_parser("verify", help="replay every game headlessly and check it")
+    verify.add_argument("path")
+    show = commands.add_parser("show", help="print one game's turns")
+    show.add_argument("path")
+    show.add_argument("number", type=int)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        start = time.perf_counter()
+        record_games(args.path, args.games, grid_size=args.grid_size, seed=args.seed)
+        print(f"recorded {args.games} games in {time.perf_counter() - start:.2f}s")
+    elif args.command == "verify":
+        start = time.perf_counter()
+        with RecordingArchive(args.path) as archive:
+            for recording in archive:
+                replay(recording)
+            count = len(archive)
+        elapsed = time.perf_counter() - start
+        print(f"verified {count} games in {elapsed:.2f}s ({count / max(elapsed, 1e-9):.0f} games/s)")
+    else:
+        with RecordingArchive(args.path) as archive:
+            recording = archive[args.number]
+            print(f"game {args.number}: seed {recording.seed}, {recording.rows}x{recording.cols}, "
+                  f"{recording.turn_count} turns")
+            for player, matched, flips in recording.turns():
+                print(f"  player {player}: {' '.join(map(str, flips))}{'  match' if matched else ''}")
+            game = replay(recording)
+            print(f"final score {game.player1_score}-{game.player2_score}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Games in progress saved to a small JSON file and resumed later.
+
+The file holds the board's card values and a GameState: the settled card
+states, scores, whose turn it is, the cards flipped so far this turn and the
+AI's memory, so a resumed game carries on exactly where it was left.
+
+Usage: python game.py --resume (after Ctrl+S in a game)
+"""
+import json
+import os
+
+import engine
+
+SAVE_PATH = "savegame.json"
+SAVE_VERSION = 1
+
+class SavedGame:
+    """A saved game as read back from disk."""
+    def __init__(self, mode, difficulty, rows, cols, values, state):
+        self.mode = mode
+        self.difficulty = difficulty
+        self.rows = rows
+        self.cols = cols
+        self.values = values
+        self.state = state  # engine.GameState
+
+    def new_game(self, rng=None, card_factory=engine.Card):
+        """Game with the saved board, all cards face down; restore(self.state) once its observers are in."""
+        return engine.Game((self.rows, self.cols), rng, card_factory, self.values)
+
+def save_game(game, mode, difficulty=None, path=SAVE_PATH):
+    state = game.snapshot()
+    data = {
+        "version": SAVE_VERSION,
+        "mode": mode,
+        "difficulty": difficulty,
+        "rows": game.rows,
+        "cols": game.cols,
+        "values": [card.value for card in game.cards],
+        "states": state.states.hex(),
+        "scores": state.scores,
+        "current_player": state.current_player,
+        "turns": state.turns,
+        "flipped": state.flipped,
+        "memories": state.memories,
+    }
+    # Written under a temporary name, so a crash mid-save leaves the last save intact
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(temporary, path)
+
+def load_game(path=SAVE_PATH):
+    with open(path) as f:
+        data = json.load(f)
+    if data.get("version") != SAVE_VERSION:
+        raise ValueError(f"{path} is not a version {SAVE_VERSION} save")
+    # JSON turns tuples into lists; GameState keeps them immutable
+    memories = tuple(None if memory is None else (memory[0], tuple(map(tuple, memory[1])))
+                     for memory in data["memories"])
+    state = engine.GameState(bytes.fromhex(data["states"]), tuple(data["scores"]), data["current_player"],
+                             data["turns"], tuple(data["flipped"]), memories)
+    return SavedGame(data["mode"], data["difficulty"], data["rows"], data["cols"], data["values"], state)
@@ -0,0 +1,27 @@
+"""Timed actions for the frame loop, measured in frame time rather than wall time."""
+import heapq
+
+class Scheduler:
+    """Runs actions once enough frame time has passed, without ever blocking."""
+    def __init__(self):
+        self.now = 0  # Milliseconds of frame time seen so far
+        self.queue = []  # Heap of (due_time, order, action)
+        self.order = 0  # Keeps actions due at the same time in FIFO order
+
+    def after(self, delay, action):
+        """Run action() once `delay` more milliseconds have been advanced."""
+        heapq.heappush(self.queue, (self.now + delay, self.order, action))
+        self.order += 1
+
+    def update(self, dt):
+        """Advance by dt milliseconds and run every action that came due."""
+        self.now += dt
+        while self.queue and self.queue[0][0] <= self.now:
+            _, _, action = heapq.heappop(self.queue)
+            action()
+
+    def pending(self):
+        return bool(self.queue)
+
+    def clear(self):
+        self.queue.clear()
@@ -0,0 +1,220 @@
+"""Authoritative multiplayer server: the server owns every board, clients only render.
+
+Clients connect over TCP, send {"type": "join"} and are paired into matches
+in the order they joined. Each match is an engine.Game on the server.
+Messages are newline-delimited JSON. In a match the only client message is
+{"type": "flip", "index": i}. The server answers with deltas only, so a
+card's value is sent when it is turned face up and never before:
+
+    start    {"match", "you", "rows", "cols", "cards", "player"}
+    flip     {"index", "value", "player"}
+    matched  {"indices", "player", "scores"}
+    hidden   {"indices"}               cards turned face down again
+    turn     {"player"}
+    over     {"scores"}
+    left     {}                        the opponent disconnected
+    error    {"reason"}
+
+{"type": "stats"} from any client is answered with the server's counters
+and CPU time, which is what the load test uses for matches per core. A
+connection that never joins is never paired.
+
+Usage: python server.py --port 8765
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import engine
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+def encode(message):
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode()
+
+def decode(line):
+    message = json.loads(line)
+    if not isinstance(message, dict):
+        raise ValueError("message is not a JSON object")
+    return message
+
+class Client:
+    def __init__(self, writer):
+        self.writer = writer
+        self.match = None
+        self.player = None  # 1 or 2 once in a match
+
+    def send(self, message):
+        self.writer.write(encode(message))
+
+    async def drain(self):
+        """Wait while this client's unsent data is over the buffer limit; a closed connection is left to its own handler."""
+        try:
+            await self.writer.drain()
+        except ConnectionError:
+            pass
+
+class Match:
+    """One game between two connected clients, resolved entirely on the server."""
+    def __init__(self, match_id, clients, grid_size, seed=None):
+        self.match_id = match_id
+        self.clients = clients
+        self.game = engine.Game(grid_size, random.Random(seed))
+        for number, client in enumerate(clients, 1):
+            client.match = self
+            client.player = number
+
+    def broadcast(self, message):
+        data = encode(message)
+        for client in self.clients:
+            client.writer.write(data)
+
+    def start(self):
+        game = self.game
+        for client in self.clients:
+            client.send({"type": "start", "match": self.match_id, "you": client.player,
+                         "rows": game.rows, "cols": game.cols, "cards": len(game.cards),
+                         "player": game.current_player})
+
+    def flip(self, client, index):
+        """Apply a client's flip and send the resulting deltas; returns False if it was refused."""
+        game = self.game
+        if client.player != game.current_player:
+            client.send({"type": "error", "reason": "not your turn"})
+            return False
+        if not isinstance(index, int) or isinstance(index, bool) or not 0 <= index < len(game.cards):
+            client.send({"type": "error", "reason": "no such card"})
+            return False
+        card = game.cards[index]
+        if not game.flip(card):
+            client.send({"type": "error", "reason": "card can't be flipped"})
+            return False
+        self.broadcast({"type": "flip", "index": index, "value": card.value, "player": client.player})
+
+        if game.turn_complete():
+            flipped = [card.index for card in game.flipped]
+            mover = game.current_player
+            if game.resolve_turn():
+                self.broadcast({"type": "matched", "indices": flipped, "player": mover, "scores": game.scores})
+            else:
+                self.broadcast({"type": "hidden", "indices": flipped})
+                self.broadcast({"type": "turn", "player": game.current_player})
+            if game.is_over():
+                self.broadcast({"type": "over", "scores": game.scores})
+        return True
+
+class GameServer:
+    """Pairs clients into matches and relays their flips; one process, one event loop."""
+    def __init__(self, grid_size=engine.GRID_SIZE, seed=None):
+        self.grid_size = grid_size
+        self.rng = random.Random(seed)
+        self.waiting = None  # Client waiting for an opponent
+        self.match_count = 0
+        self.active_matches = 0
+        self.finished_matches = 0
+        self.messages_in = 0
+        self.started = time.perf_counter()
+
+    def stats(self):
+        return {
+            "type": "stats",
+            "matches": self.match_count,
+            "active": self.active_matches,
+            "finished": self.finished_matches,
+            "messages_in": self.messages_in,
+            "cpu_seconds": time.process_time(),
+            "uptime": time.perf_counter() - self.started,
+        }
+
+    def pair(self, client):
+        if self.waiting is None or self.waiting.writer.is_closing():
+            self.waiting = client
+            return
+        self.match_count += 1
+        self.active_matches += 1
+        match = Match(self.match_count, (self.waiting, client), self.grid_size, self.rng.getrandbits(64))
+        self.waiting = None
+        match.start()
+
+    def end_match(self, match):
+        self.active_matches -= 1
+        if match.game.is_over():
+            self.finished_matches += 1
+        for client in match.clients:
+            client.match = None
+
+    async def handle(self, reader, writer):
+        client = Client(writer)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Longer than the stream limit; readline() has already dropped it
+                    client.send({"type": "error", "reason": "message too long"})
+                    await writer.drain()
+                    continue
+                if not line:
+                    break
+                self.messages_in += 1
+                try:
+                    message = decode(line)
+                except ValueError:
+                    client.send({"type": "error", "reason": "bad message"})
+                    continue
+
+                kind = message.get("type")
+                if kind == "stats":
+                    client.send(self.stats())
+                elif kind == "join" and client.match is None and self.waiting is not client:
+                    self.pair(client)
+                elif kind == "flip" and client.match is not None:
+                    match = client.match
+                    match.flip(client, message.get("index"))
+                    if match.game.is_over():
+                        self.end_match(match)
+                        break
+                    # The flip went to both players; a slow reader holds up its opponent rather than growing its buffer
+                    for other in match.clients:
+                        if other is not client:
+                            await other.drain()
+                else:
+                    client.send({"type": "error", "reason": f"unexpected {kind!r}"})
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            if self.waiting is client:
+                self.waiting = None
+            match = client.match
+            if match is not None:
+                self.end_match(match)
+                for other in match.clients:
+                    if other is not client and not other.writer.is_closing():
+                        other.send({"type": "left"})
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle, host, port, limit=1 << 16, backlog=4096)
+        async with server:
+            await server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the authoritative Memory Match server.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--grid-size", type=int, default=engine.GRID_SIZE)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    print(f"serving {args.grid_size}x{args.grid_size} matches on {args.host}:{args.port}")
+    try:
+        asyncio.run(GameServer(args.grid_size, args.seed).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""Optimal play for the triplet memory game, assuming both players never forget.
+
+With perfect memory every position is described by how many unmatched values
+have 0, 1, 2 or 3 known cards; which values and where they sit don't matter.
+Those counts are the canonical states stored in the transposition table.
+Values are the mover's expected final score margin. The game is constant-sum,
+so maximizing that is the same as maximizing the mover's expected score.
+
+A turn that doesn't make a match must turn over at least one unseen card.
+Without that rule optimal play could stall forever by re-flipping known cards.
+
+Usage: python solver.py --values 12 27 48 --out-dir policies
+"""
+import argparse
+import json
+import os
+import random
+
+from engine import MATCH_SIZE, AIMemory
+
+# Flip actions
+ACTION_UNKNOWN = "unknown"  # A card nobody has seen
+ACTION_KNOWN1 = "known1"  # A known card of a value with 1 known card
+ACTION_KNOWN2 = "known2"  # A known card of a value with 2 known cards
+ACTION_SAME = "same"  # A known card of the value already face up this turn
+ACTION_OTHER = "other"  # Any other known card: no new information, no match
+
+POLICY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "policies")
+STANDARD_VALUE_COUNTS = (12, 27, 48)  # 6x6, 9x9 and 12x12 boards
+
+def unknown_count(counts):
+    """Unseen cards on a board with counts[k] values that have k known cards."""
+    return sum(count * (MATCH_SIZE - known) for known, count in enumerate(counts[:MATCH_SIZE]))
+
+def reveal(counts, known):
+    """Counts after an unseen card of a value with `known` known cards is turned over."""
+    counts = list(counts)
+    counts[known] -= 1
+    counts[known + 1] += 1
+    return tuple(counts)
+
+def remove_value(counts, known):
+    """Counts with one value that has `known` known cards taken out."""
+    counts = list(counts)
+    counts[known] -= 1
+    return tuple(counts)
+
+def add_value(counts, known):
+    """Counts with one more value that has `known` known cards."""
+    counts = list(counts)
+    counts[known] += 1
+    return tuple(counts)
+
+def best(options):
+    action = max(options, key=options.get)
+    return action, options[action]
+
+class Solver:
+    """Memoized expected-value search over canonical information states."""
+    def __init__(self):
+        self.values = {(0, 0, 0): 0.0}  # Transposition table {(n0, n1, n2): value}
+        self.turn_values = {}  # {decision key: value}
+        self.policy = {}  # {decision key: action}
+
+    def value(self, counts):
+        """Value for the player to move; fully known values are matched first."""
+        counts = tuple(counts) + (0,) * (MATCH_SIZE + 1 - len(counts))
+        key = counts[:MATCH_SIZE]
+        if key not in self.values:
+            self.start(*key)
+        return counts[MATCH_SIZE] + self.values[key]
+
+    def decide(self, key, options):
+        action, value = best(options)
+        self.policy[key] = action
+        self.turn_values[key] = value
+        return value
+
+    def start(self, n0, n1, n2):
+        """First flip of a turn with no fully known value left."""
+        key = ("start", n0, n1, n2)
+        if key in self.turn_values:
+            return self.turn_values[key]
+
+        counts = (n0, n1, n2)
+        unknown = unknown_count(counts)
+        options = {}
+        if unknown:
+            # The card turned over joins the known ones of its value
+            options[ACTION_UNKNOWN] = sum(
+                counts[known] * (MATCH_SIZE - known) / unknown *
+                self.second(remove_value(counts, known), known, MATCH_SIZE - 1 - known, True)
+                for known in range(MATCH_SIZE) if counts[known])
+        if n1:
+            options[ACTION_KNOWN1] = self.second(remove_value(counts, 1), 0, 2, False)
+        if n2:
+            options[ACTION_KNOWN2] = self.second(remove_value(counts, 2), 1, 1, False)
+
+        value = self.decide(key, options)
+        self.values[counts] = value
+        return value
+
+    def second(self, rest, known, unseen, revealed):
+        """Second flip: one card of a value is up, `known` more are known, `unseen` aren't."""
+        key = ("second",) + rest + (known, unseen, revealed)
+        if key in self.turn_values:
+            return self.turn_values[key]
+
+        unknown = unknown_count(rest) + unseen
+        options = {}
+        if known:
+            options[ACTION_SAME] = self.third(rest, known - 1, unseen, revealed)
+        if unknown:
+            expected = unseen / unknown * self.third(rest, known, unseen - 1, True) if unseen else 0.0
+            for other in range(MATCH_SIZE):
+                if rest[other]:
+                    chance = rest[other] * (MATCH_SIZE - other) / unknown
+                    missed = add_value(reveal(rest + (0,), other), MATCH_SIZE - unseen)
+                    expected += chance * self.miss(missed, True)
+            options[ACTION_UNKNOWN] = expected
+        if rest[1] or rest[2]:
+            options[ACTION_OTHER] = self.miss(add_value(rest + (0,), MATCH_SIZE - unseen), revealed)
+
+        return self.decide(key, options)
+
+    def third(self, rest, known, unseen, revealed):
+        """Third flip with two cards of the same value up."""
+        key = ("third",) + rest + (known, unseen, revealed)
+        if key in self.turn_values:
+            return self.turn_values[key]
+
+        unknown = unknown_count(rest) + unseen
+        matched = 1 + self.value(rest)
+        options = {}
+        if known:
+            options[ACTION_SAME] = matched
+        if unknown:
+            expected = unseen / unknown * matched
+            for other in range(MATCH_SIZE):
+                if rest[other]:
+                    chance = rest[other] * (MATCH_SIZE - other) / unknown
+                    missed = add_value(reveal(rest + (0,), other), MATCH_SIZE - unseen)
+                    expected -= chance * self.value(missed)
+            options[ACTION_UNKNOWN] = expected
+        if (rest[1] or rest[2]) and (revealed or not unknown):
+            options[ACTION_OTHER] = -self.value(add_value(rest + (0,), MATCH_SIZE - unseen))
+
+        return self.decide(key, options)
+
+    def miss(self, counts, revealed):
+        """Third flip once the turn can no longer match; two cards are up."""
+        key = ("miss",) + counts + (revealed,)
+        if key in self.turn_values:
+            return self.turn_values[key]
+
+        unknown = unknown_count(counts)
+        spare_known = sum(count * known for known, count in enumerate(counts)) - 2
+        options = {}
+        if unknown:
+            options[ACTION_UNKNOWN] = -sum(
+                counts[known] * (MATCH_SIZE - known) / unknown * self.value(reveal(counts, known))
+                for known in range(MATCH_SIZE) if counts[known])
+        if spare_known > 0 and (revealed or not unknown):
+            options[ACTION_OTHER] = -self.value(counts)
+
+        return self.decide(key, options)
+
+    def solve(self, value_count):
+        """Fill the tables for every state with up to value_count unmatched values."""
+        for total in range(1, value_count + 1):
+            # Fewer unseen cards first, so every state a turn can reach is already solved
+            states = [(n0, n1, total - n0 - n1)
+                      for n0 in range(total + 1) for n1 in range(total - n0 + 1)]
+            for state in sorted(states, key=unknown_count):
+                self.start(*state)
+        return self
+
+    def action(self, key):
+        """Best action for a decision key, solving it now if it isn't in the table."""
+        if key not in self.policy:
+            kind, args = key[0], key[1:]
+            if kind == "start":
+                self.start(*args)
+            elif kind == "miss":
+                self.miss(args[:-1], args[-1])
+            else:
+                getattr(self, kind)(args[:MATCH_SIZE], *args[MATCH_SIZE:])
+        return self.policy[key]
+
+    def save(self, path):
+        table = {"|".join(map(str, key)): action for key, action in self.policy.items()}
+        with open(path, "w") as f:
+            json.dump(table, f)
+
+    def load(self, path):
+        with open(path) as f:
+            table = json.load(f)
+        for text, action in table.items():
+            kind, *fields = text.split("|")
+            self.policy[(kind,) + tuple(field == "True" if field in ("True", "False") else int(field)
+                                        for field in fields)] = action
+        return self
+
+def policy_path(value_count):
+    return os.path.join(POLICY_DIR, f"policy_{value_count}.json")
+
+_solvers = {}
+
+def get_solver(value_count):
+    """Shared solver for a board size, loaded from a saved policy table when there is one."""
+    solver = _solvers.get(value_count)
+    if solver is None:
+        solver = Solver()
+        if os.path.exists(policy_path(value_count)):
+            solver.load(policy_path(value_count))
+        _solvers[value_count] = solver
+    return solver
+
+class SolverAI:
+    """Hard AI that never forgets and plays the solver's policy."""
+    def __init__(self, rng=random, solver=None):
+        self.rng = rng
+        self.solver = solver
+        self.memory = AIMemory()
+        self.revealed = False  # Whether this turn has turned over an unseen card
+
+    def remember(self, card):
+        self.memory.remember(card)
+
+    def forget(self, value):
+        self.memory.forget(value)
+
+    def end_turn(self):
+        self.memory.end_turn()
+
+    def known_counts(self, unmatched_values, skip=None):
+        """(n0, n1, n2, n3) over remembered values, leaving out `skip`."""
+        counts = [0] * (MATCH_SIZE + 1)
+        for value, positions in self.memory.positions.items():
+            if value != skip:
+                counts[len(positions)] += 1
+        counts[0] = unmatched_values - sum(counts) - (skip is not None)
+        return tuple(counts)
+
+    def choose_card(self, board, flipped):
+        """Pick the next card to flip given the cards flipped so far this turn."""
+        # Cards still turning face down from the last turn are unmatched too, so count by matched values
+        total_values = (len(board.hidden) + len(board.revealed) + len(board.matched)) // MATCH_SIZE
+        unmatched_values = total_values - len(board.matched) // MATCH_SIZE
+        if self.solver is None:
+            self.solver = get_solver(total_values)
+
+        if not flipped:
+            self.revealed = False
+            # Fully known values are always matched straight away
+            potential_match = self.memory.known_match()
+            if potential_match:
+                return potential_match[0]
+            n0, n1, n2, _ = self.known_counts(unmatched_values)
+            action = self.action(("start", n0, n1, n2))
+            return self.pick(board, flipped, action)
+
+        value = flipped[0].value
+        known = len(self.memory.positions.get(value, ()))
+        if all(card.value == value for card in flipped):
+            rest = self.known_counts(unmatched_values, skip=value)[:MATCH_SIZE]
+            kind = "second" if len(flipped) == 1 else "third"
+            unseen = MATCH_SIZE - known
+            key = (kind,) + rest + (known - len(flipped), unseen, self.revealed)
+        else:
+            key = ("miss",) + self.known_counts(unmatched_values) + (self.revealed,)
+        return self.pick(board, flipped, self.action(key))
+
+    def action(self, key):
+        # A negative count is a state the solver never bottoms out on; it would recurse until it overflows
+        if any(count < 0 for count in key[1:]):
+            raise RuntimeError(f"inconsistent solver state {key}")
+        return self.solver.action(key)
+
+    def pick(self, board, flipped, action):
+        """A concrete card for an abstract action."""
+        if action == ACTION_UNKNOWN:
+            self.revealed = True
+            return self.unseen_card(board)
+        on_track = flipped and all(card.value == flipped[0].value for card in flipped)
+        for value, positions in self.memory.positions.items():
+            if action == ACTION_SAME and value != flipped[0].value:
+                continue
+            if action == ACTION_KNOWN1 and len(positions) != 1:
+                continue
+            if action == ACTION_KNOWN2 and len(positions) != 2:
+                continue
+            if action == ACTION_OTHER and on_track and value == flipped[0].value:
+                continue
+            for card in self.memory.cards(value):
+                if card.is_available():
+                    return card
+        return self.unseen_card(board)
+
+    def unseen_card(self, board):
+        """A random face-down card that isn't remembered."""
+        for _ in range(8):
+            card = board.hidden.choice(self.rng)
+            if card.index not in self.memory.recent:
+                return card
+        unseen = [card for card in board.hidden if card.index not in self.memory.recent]
+        return self.rng.choice(unseen) if unseen else board.hidden.choice(self.rng)
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute optimal-play policy tables.")
+    parser.add_argument("--values", type=int, nargs="+", default=list(STANDARD_VALUE_COUNTS),
+                        help="number of card values (cards / 3) to solve for")
+    parser.add_argument("--out-dir", default=POLICY_DIR)
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    for value_count in args.values:
+        solver = Solver().solve(value_count)
+        path = os.path.join(args.out_dir, f"policy_{value_count}.json")
+        solver.save(path)
+        print(f"{value_count} values: {len(solver.policy)} decisions, "
+              f"first-player margin {solver.values[(value_count, 0, 0)]:+.3f} -> {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Constant-time picking of cards under a point, by grid arithmetic.
+
+Rects are plain (x, y, width, height) tuples so this works without pygame.
+Points and rects are in world coordinates; the Camera maps screen points
+there first, so picking stays correct at any scroll or zoom.
+"""
+
+class GridLayout:
+    """Uniform grid of equal square cells with spacing around every cell."""
+    def __init__(self, rows, cols, cell_size, spacing, origin=(0, 0)):
+        self.rows = rows
+        self.cols = cols
+        self.cell_size = cell_size
+        self.spacing = spacing
+        self.origin = origin
+        self.pitch = cell_size + spacing
+
+    @property
+    def width(self):
+        return self.spacing + self.cols * self.pitch
+
+    @property
+    def height(self):
+        return self.spacing + self.rows * self.pitch
+
+    def cell_rect(self, row, col):
+        x = self.origin[0] + self.spacing + col * self.pitch
+        y = self.origin[1] + self.spacing + row * self.pitch
+        return (x, y, self.cell_size, self.cell_size)
+
+    def cell_at(self, x, y):
+        """(row, col) of the cell under the point, or None in a gap or off the grid."""
+        x -= self.origin[0] + self.spacing
+        y -= self.origin[1] + self.spacing
+        if x < 0 or y < 0:
+            return None
+        col, offset_x = divmod(int(x), self.pitch)
+        row, offset_y = divmod(int(y), self.pitch)
+        if row >= self.rows or col >= self.cols:
+            return None
+        if offset_x >= self.cell_size or offset_y >= self.cell_size:
+            return None  # In the spacing between cells
+        return row, col
+
+    def index_at(self, x, y):
+        """Row-major index of the cell under the point, or None."""
+        cell = self.cell_at(x, y)
+        if cell is None:
+            return None
+        return cell[0] * self.cols + cell[1]
+
+    def indices_in_rect(self, rect):
+        """Row-major indices of every cell overlapping rect, without visiting the others."""
+        x, y, width, height = rect
+        x -= self.origin[0] + self.spacing
+        y -= self.origin[1] + self.spacing
+        first_col = max(0, int(x // self.pitch))
+        first_row = max(0, int(y // self.pitch))
+        last_col = min(self.cols - 1, int((x + width) // self.pitch))
+        last_row = min(self.rows - 1, int((y + height) // self.pitch))
+        for row in range(first_row, last_row + 1):
+            start = row * self.cols
+            yield from range(start + first_col, start + last_col + 1)
@@ -0,0 +1,258 @@
+"""Persistent game results and leaderboard totals in SQLite.
+
+Every finished game is one row in `games`, indexed by player, mode and date.
+A `totals` table keeps running counts per (mode, player1, player2), updated
+in the same transaction, so the aggregates the UI shows cost the same however
+many millions of games the store holds. Writes go through a queue to a
+background thread that commits them in batches. The frame loop only appends
+to the queue and reads an in-memory copy of the totals.
+
+Usage: python stats.py show
+       python stats.py recent --mode ai --limit 20
+"""
+import argparse
+import queue
+import sqlite3
+import threading
+import time
+
+STATS_PATH = "stats.db"
+BATCH_SIZE = 10000  # Most games committed in one transaction
+FLUSH_INTERVAL = 0.5  # Seconds a batch waits for more games before committing
+
+# Modes a game can be recorded under
+MODE_AI = "ai"
+MODE_FRIEND = "friend"
+MODE_ONLINE = "online"
+MODE_TOURNAMENT = "tournament"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    played_at REAL NOT NULL,
+    mode TEXT NOT NULL,
+    player1 TEXT NOT NULL,
+    player2 TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    cols INTEGER NOT NULL,
+    score1 INTEGER NOT NULL,
+    score2 INTEGER NOT NULL,
+    turns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_player1 ON games (player1, mode, played_at);
+CREATE INDEX IF NOT EXISTS games_player2 ON games (player2, mode, played_at);
+CREATE TABLE IF NOT EXISTS totals (
+    mode TEXT NOT NULL,
+    player1 TEXT NOT NULL,
+    player2 TEXT NOT NULL,
+    games INTEGER NOT NULL,
+    wins1 INTEGER NOT NULL,
+    wins2 INTEGER NOT NULL,
+    best1 INTEGER NOT NULL,
+    best2 INTEGER NOT NULL,
+    turns INTEGER NOT NULL,
+    PRIMARY KEY (mode, player1, player2)
+);
+"""
+
+INSERT_GAME = "INSERT INTO games (played_at, mode, player1, player2, rows, cols, score1, score2, turns) " \
+              "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+UPSERT_TOTALS = """
+INSERT INTO totals VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (mode, player1, player2) DO UPDATE SET
+    games = games + excluded.games,
+    wins1 = wins1 + excluded.wins1,
+    wins2 = wins2 + excluded.wins2,
+    best1 = max(best1, excluded.best1),
+    best2 = max(best2, excluded.best2),
+    turns = turns + excluded.turns
+"""
+
+def connect(path):
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")  # Readers never wait for the writer
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+def game_result(mode, player1, player2, rows, cols, score1, score2, turns, played_at=None):
+    """One `games` row; scores are from player1's side."""
+    return (time.time() if played_at is None else played_at,
+            mode, player1, player2, rows, cols, score1, score2, turns)
+
+class Totals:
+    """Running counts for one (mode, player1, player2) pairing."""
+    def __init__(self, games=0, wins1=0, wins2=0, best1=0, best2=0, turns=0):
+        self.games = games
+        self.wins1 = wins1
+        self.wins2 = wins2
+        self.best1 = best1
+        self.best2 = best2
+        self.turns = turns
+
+    def add(self, score1, score2, turns):
+        self.games += 1
+        self.wins1 += score1 > score2
+        self.wins2 += score2 > score1
+        self.best1 = max(self.best1, score1)
+        self.best2 = max(self.best2, score2)
+        self.turns += turns
+
+    def merge(self, other):
+        self.games += other.games
+        self.wins1 += other.wins1
+        self.wins2 += other.wins2
+        self.best1 = max(self.best1, other.best1)
+        self.best2 = max(self.best2, other.best2)
+        self.turns += other.turns
+
+    def row(self):
+        return (self.games, self.wins1, self.wins2, self.best1, self.best2, self.turns)
+
+    @property
+    def ties(self):
+        return self.games - self.wins1 - self.wins2
+
+    def win_rate(self):
+        return self.wins1 / self.games if self.games else 0.0
+
+    def average_turns(self):
+        return self.turns / self.games if self.games else 0.0
+
+def add_results(totals, results):
+    """Fold `games` rows into a {(mode, player1, player2): Totals} dict."""
+    for _, mode, player1, player2, _, _, score1, score2, turns in results:
+        key = (mode, player1, player2)
+        if key not in totals:
+            totals[key] = Totals()
+        totals[key].add(score1, score2, turns)
+    return totals
+
+class StatsStore:
+    """Results store for one process: record() queues, a thread commits in batches.
+
+    The totals are loaded once and then kept up to date in memory as games are
+    recorded, so summary() never touches the disk. refresh() reloads them to
+    pick up games written by other processes, such as a tournament run.
+    """
+    def __init__(self, path=STATS_PATH, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.reader = connect(path)
+        self.totals = self.load_totals()
+        self.queue = queue.Queue()  # Lists of rows; None stops the thread
+        self.lock = threading.Lock()
+        self.unsaved = 0  # Rows queued but not committed yet
+        self.thread = threading.Thread(target=self.write_loop, daemon=True)
+        self.thread.start()
+
+    def load_totals(self):
+        return {(mode, player1, player2): Totals(*counts)
+                for mode, player1, player2, *counts in self.reader.execute("SELECT * FROM totals")}
+
+    def record(self, result):
+        self.record_many([result])
+
+    def record_many(self, results):
+        """Queue finished games (game_result() rows) without waiting on disk."""
+        results = list(results)
+        if not results:
+            return
+        add_results(self.totals, results)
+        with self.lock:
+            self.unsaved += len(results)
+        self.queue.put(results)
+
+    def write_loop(self):
+        connection = connect(self.path)
+        stopping = False
+        while not stopping:
+            batch = self.queue.get()
+            if batch is None:
+                break
+            # Gather whatever else arrives soon, so bursts share one transaction
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    more = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if more is None:
+                    stopping = True
+                    break
+                batch.extend(more)
+            self.commit(connection, batch)
+        connection.close()
+
+    def commit(self, connection, batch):
+        with connection:
+            connection.executemany(INSERT_GAME, batch)
+            connection.executemany(UPSERT_TOTALS, [key + totals.row()
+                                                   for key, totals in add_results({}, batch).items()])
+        with self.lock:
+            self.unsaved -= len(batch)
+
+    def refresh(self):
+        """Reload the totals from disk; skipped while our own games are still queued."""
+        with self.lock:
+            if self.unsaved:
+                return False
+        self.totals = self.load_totals()  # Only this thread adds rows, so none can slip in here
+        return True
+
+    def summary(self, mode, player1=None, player2=None):
+        """Merged Totals for a mode, optionally narrowed to one player on either side."""
+        merged = Totals()
+        for (row_mode, row_player1, row_player2), totals in self.totals.items():
+            if row_mode == mode and player1 in (None, row_player1) and player2 in (None, row_player2):
+                merged.merge(totals)
+        return merged
+
+    def recent(self, mode, player1=None, limit=10):
+        """Latest games of a mode, newest first, straight from the indexed table."""
+        if player1 is None:
+            query = "SELECT * FROM games WHERE mode = ? ORDER BY id DESC LIMIT ?"
+            parameters = (mode, limit)
+        else:
+            query = "SELECT * FROM games WHERE player1 = ? AND mode = ? ORDER BY played_at DESC LIMIT ?"
+            parameters = (player1, mode, limit)
+        return self.reader.execute(query, parameters).fetchall()
+
+    def close(self):
+        """Commit everything queued and close both connections."""
+        self.queue.put(None)
+        self.thread.join()
+        self.reader.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Show stored game results.")
+    parser.add_argument("--path", default=STATS_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("show", help="totals per mode and pairing")
+    recent = commands.add_parser("recent", help="latest games of one mode")
+    recent.add_argument("--mode", default=MODE_AI)
+    recent.add_argument("--player")
+    recent.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    with StatsStore(args.path) as store:
+        if args.command == "show":
+            for (mode, player1, player2), totals in sorted(store.totals.items()):
+                print(f"{mode:<10} {player1} vs {player2}: {totals.games} games, "
+                      f"{totals.wins1}-{totals.wins2}-{totals.ties}, best {totals.best1}-{totals.best2}, "
+                      f"{totals.average_turns():.1f} turns on average")
+        else:
+            for _, played_at, mode, player1, player2, rows, cols, score1, score2, turns in \
+                    store.recent(args.mode, args.player, args.limit):
+                print(f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(played_at))} "
+                      f"{player1} {score1}-{score2} {player2} ({rows}x{cols}, {turns} turns)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Bounded cache for pre-rendered pygame surfaces."""
+from collections import OrderedDict
+
+class SurfaceCache:
+    """Least-recently-used cache of surfaces, built on first request."""
+    def __init__(self, max_entries=512):
+        self.base_entries = max_entries
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        """Return the surface cached under key, calling build() to make it on a miss."""
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = build()
+        self.entries[key] = surface
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)  # Evict least recently used
+        return surface
+
+    def reserve(self, entries):
+        """Room for this many entries on top of the base size, e.g. a face and a back per card in view."""
+        self.max_entries = self.base_entries + entries
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,158 @@
+"""Image themes for the card faces, loaded without holding up the frame loop.
+
+A theme is a folder under themes/ with one image per card value: sorted by
+file name, the first image is value 1, the second value 2 and so on. Values
+past the last image keep their number face. Worker threads decode the images
+and scale them to the card size. The scaled sprites are saved under
+.sprite_cache/, keyed by a hash of the source file and the size, so later
+launches skip decoding and scaling. The frame loop picks up finished sprites
+with poll(), which converts them for fast blitting within a per-frame time
+budget.
+"""
+import hashlib
+import io
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+THEMES_DIR = os.path.join(BASE_DIR, "themes")
+CACHE_DIR = os.path.join(BASE_DIR, ".sprite_cache")
+NUMBERS_THEME = "numbers"  # Built in: the value drawn as text
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tga", ".webp")
+LOADER_WORKERS = max(1, (os.cpu_count() or 2) - 1)  # Leave a core for the frame loop
+POLL_BUDGET_MS = 2  # Frame time poll() may spend converting new sprites
+SPRITE_FORMAT = "RGBA"  # Pixel layout of the cached sprite files
+
+def theme_images(path):
+    return sorted(entry.path for entry in os.scandir(path)
+                  if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS))
+
+def list_themes(themes_dir=THEMES_DIR):
+    """Theme names for the menu, the built-in numbers first."""
+    names = [NUMBERS_THEME]
+    if os.path.isdir(themes_dir):
+        names += sorted(entry.name for entry in os.scandir(themes_dir)
+                        if entry.is_dir() and theme_images(entry.path))
+    return names
+
+def scale_to_fit(image, size):
+    """Image scaled to fit a size x size sprite, centered on transparency."""
+    width, height = image.get_size()
+    scale = size / max(width, height)
+    scaled_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    if image.get_bitsize() not in (24, 32):
+        # smoothscale needs 24 or 32-bit pixels; blitting converts without needing a display
+        source = pygame.Surface((width, height), pygame.SRCALPHA, 32)
+        source.blit(image, (0, 0))
+        image = source
+    sprite = pygame.Surface((size, size), pygame.SRCALPHA, 32)
+    scaled = pygame.transform.smoothscale(image, scaled_size)
+    sprite.blit(scaled, scaled.get_rect(center=(size // 2, size // 2)))
+    return sprite
+
+def load_sprite(path, size, cache_dir=CACHE_DIR):
+    """Scaled sprite for one image, from the disk cache when it has been scaled before."""
+    with open(path, "rb") as f:
+        data = f.read()
+    cache_path = os.path.join(cache_dir, f"{hashlib.sha1(data).hexdigest()}-{size}.rgba")
+    try:
+        with open(cache_path, "rb") as f:
+            return pygame.image.frombytes(f.read(), (size, size), SPRITE_FORMAT)
+    except (OSError, ValueError):
+        pass  # Not cached yet, or cached at a different size by a bad write
+
+    sprite = scale_to_fit(pygame.image.load(io.BytesIO(data), os.path.basename(path)), size)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Written under a temporary name, so other loaders never read half a file
+    temporary = f"{cache_path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(pygame.image.tobytes(sprite, SPRITE_FORMAT))
+    os.replace(temporary, cache_path)
+    return sprite
+
+class ThemeLoader:
+    """Sprites of the current theme at the current size, filled in as the workers finish."""
+    def __init__(self, themes_dir=THEMES_DIR, cache_dir=CACHE_DIR, workers=LOADER_WORKERS):
+        self.themes_dir = themes_dir
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.executor = None  # Started by the first image theme
+        self.theme = NUMBERS_THEME
+        self.size = None
+        self.sprites = {}  # {value: converted sprite}
+        self.futures = []
+        self.failed = 0
+        self.finished = queue.SimpleQueue()  # (generation, value, future) from the workers
+        self.generation = 0  # Bumped on every load, so stale sprites are dropped
+
+    def load(self, theme, size):
+        """Start loading a theme at a sprite size; returns at once, sprites arrive through poll()."""
+        if (theme, size) == (self.theme, self.size):
+            return
+        for future in self.futures:
+            future.cancel()
+        self.generation += 1
+        self.theme = theme
+        self.size = size
+        self.sprites = {}
+        self.futures = []
+        self.failed = 0
+        if theme == NUMBERS_THEME:
+            return
+
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix="theme")
+        generation = self.generation
+        for value, path in enumerate(theme_images(os.path.join(self.themes_dir, theme)), 1):
+            future = self.executor.submit(load_sprite, path, size, self.cache_dir)
+            future.add_done_callback(
+                lambda future, value=value: self.finished.put((generation, value, future)))
+            self.futures.append(future)
+
+    def poll(self, budget_ms=POLL_BUDGET_MS):
+        """Convert finished sprites until the budget is spent; True if the progress changed."""
+        deadline = time.perf_counter() + budget_ms / 1000
+        changed = False
+        while time.perf_counter() < deadline:
+            try:
+                generation, value, future = self.finished.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self.generation or future.cancelled():
+                continue
+            changed = True
+            if future.exception() is not None:
+                self.failed += 1  # Unreadable image; that value keeps its number face
+                continue
+            self.sprites[value] = future.result().convert_alpha()
+        return changed
+
+    def sprite(self, value):
+        """Converted sprite for a card value, or None while it is loading or missing."""
+        return self.sprites.get(value)
+
+    def loading(self):
+        """True while sprites are still on their way."""
+        loaded, total = self.progress()
+        return loaded < total
+
+    def progress(self):
+        """(sprites ready or failed, images in the theme)"""
+        return len(self.sprites) + self.failed, len(self.futures)
+
+    def close(self):
+        """Stop the workers and drop the sprites, e.g. when the display they were converted for closes."""
+        for future in self.futures:
+            future.cancel()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        self.generation += 1
+        self.size = None  # Loaded again by the next load()
+        self.sprites = {}
+        self.futures = []
@@ -0,0 +1,188 @@
+"""Play large batches of headless games across all cores and summarize them.
+
+Usage: python tournament.py --games 100000 --players memory random
+"""
+import argparse
+import math
+import multiprocessing
+import time
+from collections import Counter
+from functools import partial
+
+import engine
+import hints
+import montecarlo
+import solver
+import stats as game_stats
+
+MONTECARLO_SAMPLES = 32  # Samples per decision for the Monte Carlo player
+
+# Player classes a tournament can pit against each other
+PLAYERS = {
+    "memory": engine.MemoryAI,
+    "random": engine.RandomPlayer,
+    "solver": solver.SolverAI,
+    "hints": hints.HintEngine,
+    # Already inside a worker process; a fixed sample count keeps results reproducible
+    "montecarlo": partial(montecarlo.MonteCarloAI, budget_ms=None, workers=0, max_samples=MONTECARLO_SAMPLES),
+}
+for difficulty, limits in engine.AI_DIFFICULTIES.items():
+    PLAYERS[f"memory-{difficulty}"] = partial(engine.MemoryAI, **limits)
+
+CHUNK_SIZE = 250  # Games per task sent to a worker
+
+def game_seed(base_seed, game_index):
+    """Reproducible seed for one game, independent of which worker plays it."""
+    return (base_seed << 32) | game_index
+
+def play_chunk(task):
+    """Play games [start, start + count) and return one result tuple per game."""
+    player_names, grid_size, base_seed, start, count = task
+    players = [PLAYERS[name] for name in player_names]
+
+    results = []
+    for game_index in range(start, start + count):
+        game = engine.play_game(players, grid_size, game_seed(base_seed, game_index))
+        results.append((game_index, game.player1_score, game.player2_score, game.turns))
+    return results
+
+class RunningStat:
+    """Count, mean, spread and extremes of a stream of numbers."""
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.total_squares = 0
+        self.minimum = None
+        self.maximum = None
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.total_squares += value * value
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def stdev(self):
+        if self.count < 2:
+            return 0.0
+        variance = (self.total_squares - self.total * self.total / self.count) / (self.count - 1)
+        return math.sqrt(max(variance, 0.0))
+
+    def summary(self):
+        return {
+            "mean": self.mean(),
+            "stdev": self.stdev(),
+            "min": self.minimum,
+            "max": self.maximum,
+        }
+
+class TournamentStats:
+    """Merges per-game results streamed back from the workers."""
+    def __init__(self):
+        self.games = 0
+        self.wins = [0, 0]
+        self.ties = 0
+        self.turns = RunningStat()
+        self.scores = [RunningStat(), RunningStat()]
+        self.margin = RunningStat()  # Player 1 score minus player 2 score
+        self.margins = Counter()
+
+    def add_chunk(self, results):
+        for game_index, player1_score, player2_score, turns in results:
+            self.games += 1
+            if player1_score > player2_score:
+                self.wins[0] += 1
+            elif player2_score > player1_score:
+                self.wins[1] += 1
+            else:
+                self.ties += 1
+            self.turns.add(turns)
+            self.scores[0].add(player1_score)
+            self.scores[1].add(player2_score)
+            self.margin.add(player1_score - player2_score)
+            self.margins[player1_score - player2_score] += 1
+
+    def summary(self):
+        games = self.games or 1
+        return {
+            "games": self.games,
+            "player1_win_rate": self.wins[0] / games,
+            "player2_win_rate": self.wins[1] / games,
+            "tie_rate": self.ties / games,
+            "turns": self.turns.summary(),
+            "player1_score": self.scores[0].summary(),
+            "player2_score": self.scores[1].summary(),
+            "score_margin": self.margin.summary(),
+            "score_margin_counts": dict(sorted(self.margins.items())),
+        }
+
+def make_tasks(games, player_names, grid_size, seed, chunk_size):
+    for start in range(0, games, chunk_size):
+        yield (tuple(player_names), grid_size, seed, start, min(chunk_size, games - start))
+
+def store_results(store, results, player_names, grid_size):
+    """Queue a chunk of results in a stats.StatsStore."""
+    rows, cols = engine.board_shape(grid_size)
+    played_at = time.time()
+    store.record_many(game_stats.game_result(game_stats.MODE_TOURNAMENT, *player_names, rows, cols,
+                                             player1_score, player2_score, turns, played_at)
+                      for _, player1_score, player2_score, turns in results)
+
+def run_tournament(games, player_names=("memory", "memory"), grid_size=engine.GRID_SIZE,
+                   seed=0, workers=None, chunk_size=CHUNK_SIZE, store=None):
+    """Play `games` games on a process pool and return the merged stats.
+
+    With a stats.StatsStore every game is also saved to it.
+    """
+    stats = TournamentStats()
+    tasks = make_tasks(games, player_names, grid_size, seed, chunk_size)
+
+    def add_chunk(results):
+        stats.add_chunk(results)
+        if store is not None:
+            store_results(store, results, player_names, grid_size)
+
+    if workers == 1:
+        for task in tasks:
+            add_chunk(play_chunk(task))
+        return stats
+
+    with multiprocessing.Pool(workers) as pool:
+        # Chunks stream back in completion order; the stats don't depend on it
+        for results in pool.imap_unordered(play_chunk, tasks):
+            add_chunk(results)
+    return stats
+
+def print_summary(summary, player_names):
+    print(f"Games: {summary['games']}")
+    print(f"Player 1 ({player_names[0]}) wins: {summary['player1_win_rate']:.2%}")
+    print(f"Player 2 ({player_names[1]}) wins: {summary['player2_win_rate']:.2%}")
+    print(f"Ties: {summary['tie_rate']:.2%}")
+    for key in ("turns", "player1_score", "player2_score", "score_margin"):
+        stat = summary[key]
+        print(f"{key}: mean {stat['mean']:.2f}, stdev {stat['stdev']:.2f}, "
+              f"min {stat['min']}, max {stat['max']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a headless Memory Match tournament.")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--players", nargs=2, default=["memory", "memory"], choices=sorted(PLAYERS))
+    parser.add_argument("--grid-size", type=int, default=engine.GRID_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="defaults to all cores")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--stats", metavar="PATH", help="also save every game to this stats database")
+    args = parser.parse_args()
+
+    store = game_stats.StatsStore(args.stats) if args.stats else None
+    stats = run_tournament(args.games, args.players, args.grid_size, args.seed,
+                           args.workers, args.chunk_size, store)
+    if store is not None:
+        store.close()
+    print_summary(stats.summary(), args.players)
+
+if __name__ == "__main__":
+    main()